@@ -0,0 +1,103 @@
+# actor.py — a per-guild mailbox that runs state transitions one at a time, in arrival order
+import time
+import asyncio
+
+class MailboxFull(Exception):
+    """The guild already has `maxsize` commands waiting; the caller should back off."""
+
+class MailboxClosed(Exception):
+    """The guild's session was torn down before the command ran."""
+
+class GuildActor:
+    """
+    Single consumer of one guild's command mailbox. Commands are coroutine functions that run
+    strictly one after another, so none of them sees another's half-finished transition (no
+    double starts, no entry popped twice). submit() is for user commands and is bounded: once
+    `maxsize` are waiting it raises MailboxFull rather than queueing more work. post() is for
+    internal events (a track ending) that must never be dropped.
+    A command must not await another command on the same actor; call the function directly.
+    """
+
+    def __init__(self, name: str, maxsize: int = 32):
+        self.name = name
+        self.maxsize = maxsize
+        self._mailbox: asyncio.Queue = asyncio.Queue()
+        self._task: asyncio.Task | None = None
+        self._closed = False
+        self.processed = 0
+        self.rejected = 0
+        self.wait_total = 0.0  # seconds commands spent queued behind others
+        self.wait_max = 0.0
+
+    def submit(self, func, *args) -> asyncio.Future:
+        """Queue `func(*args)`; the future resolves to its result once it has run."""
+        if self._mailbox.qsize() >= self.maxsize:
+            self.rejected += 1
+            raise MailboxFull(f"{self.name}: {self._mailbox.qsize()} commands pending")
+        return self._put(func, args)
+
+    def post(self, func, *args) -> None:
+        """Queue `func(*args)` regardless of backlog; failures are logged, not raised."""
+        self._put(func, args).add_done_callback(self._log_failure)
+
+    def _put(self, func, args) -> asyncio.Future:
+        fut = asyncio.get_running_loop().create_future()
+        if self._closed:
+            fut.set_exception(MailboxClosed(self.name))
+            return fut
+        self._mailbox.put_nowait((func, args, fut, time.perf_counter()))
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        return fut
+
+    def _log_failure(self, fut: asyncio.Future) -> None:
+        if fut.cancelled():
+            return
+        e = fut.exception()
+        if e is not None and not isinstance(e, MailboxClosed):
+            print(f"[actor] {self.name}: command failed: {e!r}")
+
+    async def _run(self) -> None:
+        me = asyncio.current_task()
+        try:
+            while not self._closed:
+                func, args, fut, queued = await self._mailbox.get()
+                if fut.done():
+                    continue  # the caller gave up waiting
+                wait = time.perf_counter() - queued
+                self.wait_total += wait
+                self.wait_max = max(self.wait_max, wait)
+                try:
+                    result = await func(*args)
+                except asyncio.CancelledError:
+                    if me.cancelling():
+                        fut.cancel()
+                        raise
+                    # Something the command awaited was cancelled, not the actor: just a failed command
+                    if not fut.done():
+                        fut.set_exception(RuntimeError(f"{getattr(func, '__name__', func)} was cancelled"))
+                except Exception as e:
+                    if not fut.done():
+                        fut.set_exception(e)
+                else:
+                    if not fut.done():
+                        fut.set_result(result)
+                self.processed += 1
+        finally:
+            if self._task is me:
+                self._task = None  # the next _put starts a fresh consumer
+
+    @property
+    def pending(self) -> int:
+        return self._mailbox.qsize()
+
+    def close(self) -> None:
+        """Stop taking commands and fail the waiting ones. Safe to call from inside a command."""
+        self._closed = True
+        task, self._task = self._task, None
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+        while not self._mailbox.empty():
+            _, _, fut, _ = self._mailbox.get_nowait()
+            if not fut.done():
+                fut.set_exception(MailboxClosed(self.name))
@@ -0,0 +1,83 @@
+# audio.py — AudioSource wrappers used by the playback pipeline
+import queue
+import threading
+
+import discord
+
+FRAME_SECONDS = 0.02  # discord.py sends one 20 ms frame per read()
+
+class PrebufferedSource(discord.AudioSource):
+    """
+    Reads frames from `inner` on a helper thread into a bounded buffer. Constructing one
+    starts FFmpeg and fills the buffer right away, so a source built shortly before the
+    current track ends can be handed to the player with its first frames already waiting.
+    Also counts frames handed out, which gives the playback position.
+    """
+
+    def __init__(self, inner: discord.AudioSource, prebuffer_frames: int = 50, start_offset: float = 0.0):
+        self._inner = inner
+        self._buf: queue.Queue[bytes] = queue.Queue(maxsize=max(1, prebuffer_frames))
+        self._stop = threading.Event()
+        self._eof = False
+        self.frames = 0
+        self.start_offset = start_offset  # seconds into the track the inner source begins at
+        self._thread = threading.Thread(target=self._fill, name="prebuffer", daemon=True)
+        self._thread.start()
+
+    def _put(self, packet: bytes) -> bool:
+        while not self._stop.is_set():
+            try:
+                self._buf.put(packet, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _fill(self) -> None:
+        try:
+            while not self._stop.is_set():
+                packet = self._inner.read()
+                if not self._put(packet) or not packet:
+                    return
+        except Exception as e:
+            print(f"[audio] Source read failed: {e}")
+        self._put(b"")
+
+    def read(self) -> bytes:
+        if self._eof:
+            return b""
+        while True:
+            try:
+                packet = self._buf.get(timeout=0.5)
+                break
+            except queue.Empty:
+                if self._stop.is_set():
+                    return b""
+        if not packet:
+            self._eof = True
+            return b""
+        self.frames += 1
+        return packet
+
+    def is_opus(self) -> bool:
+        return self._inner.is_opus()
+
+    @property
+    def position(self) -> float:
+        """Seconds into the track that have been handed to the player."""
+        return self.start_offset + self.frames * FRAME_SECONDS
+
+    @property
+    def buffered(self) -> int:
+        return self._buf.qsize()
+
+    def cleanup(self) -> None:
+        self._stop.set()
+        try:
+            self._inner.cleanup()  # kills FFmpeg, which unblocks a pending read()
+        finally:
+            while True:
+                try:
+                    self._buf.get_nowait()
+                except queue.Empty:
+                    break
@@ -0,0 +1,201 @@
+# audio_cache.py — size-capped on-disk LRU of Ogg/Opus copies of played tracks
+import os
+import json
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+
+from stream_cache import cache_key
+
+def _file_name(url: str) -> str:
+    key = cache_key(url)
+    if key.startswith("yt:"):
+        return f"yt_{key[3:]}.ogg"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest() + ".ogg"
+
+async def _probe_duration(path: str) -> float | None:
+    """Duration of a local file in seconds via ffprobe, or None if it can't be read."""
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            "ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "default=nw=1:nk=1", path,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        out, _ = await proc.communicate()
+        return float(out)
+    except (OSError, ValueError):
+        return None
+
+class AudioCache:
+    """
+    Keeps local Ogg/Opus copies of tracks under `max_bytes`, evicting least recently played
+    files first. Copies are made in the background with FFmpeg from the stream URL the
+    first play already resolved: Opus sources are remuxed, anything else is encoded once.
+    File mtimes double as the LRU clock so the order survives restarts. Each file's duration
+    is kept in a sidecar index (durations.json), since a cache hit skips the extraction that
+    would otherwise report it.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, max_track_seconds: float = 900, max_concurrent_fills: int = 2):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_track_seconds = max_track_seconds
+        self._fill_slots = asyncio.Semaphore(max_concurrent_fills)
+        self._fills: dict[str, asyncio.Task] = {}
+        self._index: OrderedDict[str, int] = OrderedDict()  # file name -> size, LRU first
+        self._durations: dict[str, float] = {}  # file name -> seconds, when known
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.fills = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def _load(self) -> None:
+        files = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith(".part"):
+                os.remove(path)  # interrupted fill
+            elif name.endswith(".ogg"):
+                st = os.stat(path)
+                files.append((st.st_mtime, name, st.st_size))
+        for _, name, size in sorted(files):
+            self._index[name] = size
+            self.total_bytes += size
+        try:
+            with open(self._durations_path()) as f:
+                durations = json.load(f)
+        except (FileNotFoundError, ValueError):
+            durations = {}
+        self._durations = {name: d for name, d in durations.items() if name in self._index}
+        self._evict()
+
+    def _durations_path(self) -> str:
+        return os.path.join(self.directory, "durations.json")
+
+    def _save_durations(self) -> None:
+        path = self._durations_path()
+        with self._lock:
+            data = json.dumps(self._durations)
+        with open(path + ".tmp", "w") as f:
+            f.write(data)
+        os.replace(path + ".tmp", path)
+
+    def path_for(self, url: str) -> str | None:
+        """Local file for `url` if cached (marks it recently used), else None."""
+        name = _file_name(url)
+        with self._lock:
+            if name not in self._index:
+                self.misses += 1
+                return None
+            self._index.move_to_end(name)
+            self.hits += 1
+        path = os.path.join(self.directory, name)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.total_bytes -= self._index.pop(name, 0)
+                self._durations.pop(name, None)
+            return None
+        return path
+
+    def peek(self, url: str) -> str | None:
+        """Local file for `url` if cached, without counting a hit or refreshing it (lookahead)."""
+        name = _file_name(url)
+        return os.path.join(self.directory, name) if name in self._index else None
+
+    def duration(self, url: str) -> float | None:
+        """Length in seconds of the cached copy of `url`, if known."""
+        return self._durations.get(_file_name(url))
+
+    def schedule_fill(self, url: str, stream_url: str, acodec: str | None = None,
+                      duration: float | None = None, before_options: str = "") -> None:
+        """Start a background copy of `stream_url` unless cached, in progress, or too long."""
+        name = _file_name(url)
+        if name in self._index or name in self._fills:
+            return
+        if duration and duration > self.max_track_seconds:
+            return
+        task = asyncio.create_task(self._fill(name, stream_url, acodec, duration, before_options))
+        self._fills[name] = task
+        task.add_done_callback(lambda _t, n=name: self._fills.pop(n, None))
+
+    async def _fill(self, name: str, stream_url: str, acodec: str | None, duration: float | None,
+                    before_options: str) -> None:
+        final = os.path.join(self.directory, name)
+        part = final + ".part"
+        codec = ["-c:a", "copy"] if (acodec or "").startswith("opus") else ["-c:a", "libopus", "-b:a", "128k"]
+        async with self._fill_slots:
+            proc = await asyncio.create_subprocess_exec(
+                "ffmpeg", *before_options.split(), "-i", stream_url, "-vn", "-map", "0:a:0",
+                *codec, "-f", "ogg", "-y", part,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            try:
+                _, err = await proc.communicate()
+            except asyncio.CancelledError:
+                proc.kill()
+                await proc.wait()
+                if os.path.exists(part):
+                    os.remove(part)
+                raise
+        if proc.returncode != 0:
+            print(f"[audio-cache] Fill failed for {name}: {err.decode(errors='replace').strip()[-200:]}")
+            if os.path.exists(part):
+                os.remove(part)
+            return
+        os.replace(part, final)
+        if not duration:
+            duration = await _probe_duration(final)
+        self._store(name, duration)
+
+    def _store(self, name: str, duration: float | None) -> None:
+        """Index a finished file (and its duration), then trim back under budget."""
+        size = os.path.getsize(os.path.join(self.directory, name))
+        with self._lock:
+            self._index[name] = size
+            self.total_bytes += size
+            if duration:
+                self._durations[name] = float(duration)
+            self.fills += 1
+        self._evict()
+        self._save_durations()
+
+    def _evict(self) -> None:
+        with self._lock:
+            while self.total_bytes > self.max_bytes and self._index:
+                name, size = self._index.popitem(last=False)
+                self._durations.pop(name, None)
+                self.total_bytes -= size
+                self.evictions += 1
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    pass
+
+    async def cancel_fills(self) -> None:
+        """Stop in-flight copies (their FFmpeg is killed and the .part removed) and wait for them."""
+        tasks = list(self._fills.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "files": len(self._index),
+            "bytes": self.total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "fills": self.fills,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits / total) if total else 0.0,
+        }
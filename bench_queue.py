@@ -0,0 +1,67 @@
+# bench_queue.py — compare PlaybackQueue with the old list-of-tuples queue at playlist scale
+#   python bench_queue.py [entries]
+import sys
+import time
+import random
+import base64
+import tracemalloc
+
+from playback_queue import PlaybackQueue
+
+def _video_id(i: int) -> str:
+    # real IDs are 8 random bytes in base64url; derive a stable one per index
+    return base64.urlsafe_b64encode(random.Random(i).randbytes(8))[:11].decode()
+
+def _entries(n: int) -> list[tuple[str, str]]:
+    return [(f"Artist {i} - Track {i}", f"https://www.youtube.com/watch?v={_video_id(i)}") for i in range(n)]
+
+def _time(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+def bench(factory, n: int, edits: int = 2000) -> dict[str, float]:
+    entries = _entries(n)
+    rng = random.Random(1)
+    q = factory()
+    out = {"append": _time(lambda: [q.append(e) for e in entries])}
+    positions = [rng.randrange(n - edits) for _ in range(edits)]
+    out["insert"] = _time(lambda: [q.insert(i, entries[i]) for i in positions])
+    out["remove"] = _time(lambda: [q.pop(i) for i in positions])
+    out["move"] = _time(lambda: [q.insert(j, q.pop(i)) for i, j in zip(positions, reversed(positions))])
+    out["index"] = _time(lambda: [q[i] for i in positions])
+    out["render"] = _time(lambda: [q[i:i + 20] for i in positions[:200]])
+    out["pop_front_all"] = _time(lambda: [q.pop(0) for _ in range(n)])
+    return out
+
+def memory_per_entry(factory, n: int, guilds: int = 1) -> float:
+    """Bytes retained per queued entry when `guilds` guilds each queue the same n-track playlist."""
+    ids = [_video_id(i) for i in range(n)]
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    queues = []
+    for _ in range(guilds):
+        q = factory()
+        for i, vid in enumerate(ids):
+            # fresh strings per guild, as they come out of each guild's own extraction
+            q.append((f"Artist {i} - Track {i}", f"https://www.youtube.com/watch?v={vid}"))
+        queues.append(q)
+    used = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    return used / (n * guilds)
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    results = {"list": bench(list, n), "PlaybackQueue": bench(PlaybackQueue, n)}
+    ops = list(results["list"])
+    print(f"{n} entries (times in ms)")
+    print(f"{'op':<15}" + "".join(f"{name:>16}" for name in results))
+    for op in ops:
+        print(f"{op:<15}" + "".join(f"{results[name][op] * 1000:>16.1f}" for name in results))
+    print("\nmemory per entry (bytes)")
+    for guilds in (1, 4):
+        row = "".join(f"{memory_per_entry(f, n, guilds):>16.0f}" for f in (list, PlaybackQueue))
+        print(f"{f'{guilds} guild(s)':<15}{row}")
+
+if __name__ == "__main__":
+    main()
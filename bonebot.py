@@ -1,21 +1,35 @@
 # bonebot.py — YouTube + SoundCloud + Spotify (tuple queue preserved)
 import os
 import re
+import time
 import asyncio
+import threading
 from datetime import datetime, timedelta
 
 import discord
 from discord.ext import commands, tasks
 from discord import app_commands
 from dotenv import load_dotenv
-import yt_dlp
 
-# Optional Spotify support
-try:
-    import spotipy
-    from spotipy.oauth2 import SpotifyClientCredentials
-except Exception:
-    spotipy = None  # handled gracefully below
+from stream_cache import StreamCache, cache_key, video_id_from_url
+from prefetch import Prefetcher
+from session import GuildSession, SessionRegistry
+from actor import MailboxFull, MailboxClosed
+from queue_store import QueueStore
+from resume import parse_timestamp, should_resume
+from extraction import ExtractorPool, ProcessExtractor
+from audio import PrebufferedSource
+from mixer import MixerSource, MixSettings
+from audio_cache import AudioCache
+from loudness import LoudnessStore
+from search_cache import SearchCache, normalize_query
+from singleflight import SingleFlight
+from negative_cache import NegativeCache, is_permanent_error
+from ordered_map import map_ordered
+from spotify_map import SpotifyMap
+
+# Optional Spotify support (spotify_client degrades gracefully without spotipy)
+import spotify_client
 
 # -------------------------------------------------------------
 # Load environment variables
@@ -25,6 +39,65 @@ TOKEN = os.getenv("DISCORD_BOT_TOKEN")
 GUILD_ID_ENV = os.getenv("DISCORD_GUILD_ID")
 GUILD_ID = int(GUILD_ID_ENV) if GUILD_ID_ENV and GUILD_ID_ENV.isdigit() else None
 IDLE_TIMEOUT_MINUTES = int(os.getenv("IDLE_TIMEOUT_MINUTES", "30"))
+STREAM_CACHE_SIZE = int(os.getenv("STREAM_CACHE_SIZE", "512"))
+STREAM_CACHE_MARGIN_SECONDS = int(os.getenv("STREAM_CACHE_MARGIN_SECONDS", "300"))
+PREFETCH_DEPTH = int(os.getenv("PREFETCH_DEPTH", "2"))
+# Pending entries (e.g. Spotify tracks) within this many queue slots are mapped to YouTube ahead of time
+LAZY_RESOLVE_WINDOW = int(os.getenv("LAZY_RESOLVE_WINDOW", "5"))
+SPOTIFY_MAP_CONCURRENCY = int(os.getenv("SPOTIFY_MAP_CONCURRENCY", "4"))
+# Map whole Spotify collections to YouTube in the background instead of only near the head
+SPOTIFY_PREMAP = os.getenv("SPOTIFY_PREMAP", "0") == "1"
+# "transcode" (default): FFmpeg decodes, applies PLAYBACK_VOLUME and re-encodes every stream.
+# "passthrough": Opus sources are remuxed straight to Discord with no decode/encode (and no
+# volume change -- listeners use Discord's per-user volume); other codecs still transcode.
+# "mixer": FFmpeg only decodes to PCM; volume and crossfade are applied in-process per frame,
+# so /volume and /crossfade take effect immediately.
+PLAYBACK_MODE = os.getenv("PLAYBACK_MODE", "transcode").lower()
+PLAYBACK_VOLUME = float(os.getenv("PLAYBACK_VOLUME", "0.25"))
+# Start the next track's FFmpeg this many seconds before the current one ends (0 disables)
+PRESPAWN_SECONDS = float(os.getenv("PRESPAWN_SECONDS", "8"))
+PREBUFFER_FRAMES = int(os.getenv("PREBUFFER_FRAMES", "50"))  # 20 ms frames read ahead per source
+CROSSFADE_SECONDS = float(os.getenv("CROSSFADE_SECONDS", "0"))  # default per guild, mixer mode only
+# A track that stops more than RESUME_TAIL_SECONDS before its end is reopened at the same position
+RESUME_ATTEMPTS = int(os.getenv("RESUME_ATTEMPTS", "3"))
+RESUME_TAIL_SECONDS = float(os.getenv("RESUME_TAIL_SECONDS", "5"))
+# Commands a guild may have waiting before new ones are turned away
+GUILD_MAILBOX_SIZE = int(os.getenv("GUILD_MAILBOX_SIZE", "32"))
+# Queues survive restarts/crashes: changes are batched to QUEUE_DB every QUEUE_FLUSH_MS.
+# A separate file from BONEBOT_DB so a large batch never holds the lock the caches write under.
+QUEUE_PERSIST = os.getenv("QUEUE_PERSIST", "1") == "1"
+QUEUE_DB = os.getenv("QUEUE_DB", "bonebot_queues.sqlite3")
+QUEUE_FLUSH_MS = int(os.getenv("QUEUE_FLUSH_MS", "250"))
+QUEUE_SAVE_POSITION_SECONDS = float(os.getenv("QUEUE_SAVE_POSITION_SECONDS", "10"))
+# Measure each track's loudness once in the background and play it back at LOUDNESS_TARGET_LUFS
+# (a static gain in the volume filter / mixer; passthrough playback is left untouched)
+LOUDNESS_NORMALIZE = os.getenv("LOUDNESS_NORMALIZE", "0") == "1"
+LOUDNESS_TARGET_LUFS = float(os.getenv("LOUDNESS_TARGET_LUFS", "-14"))
+# On-disk Opus cache of played tracks; disabled unless AUDIO_CACHE_DIR is set
+AUDIO_CACHE_DIR = os.getenv("AUDIO_CACHE_DIR")
+AUDIO_CACHE_MAX_MB = int(os.getenv("AUDIO_CACHE_MAX_MB", "2048"))
+AUDIO_CACHE_MAX_TRACK_MINUTES = float(os.getenv("AUDIO_CACHE_MAX_TRACK_MINUTES", "15"))
+# Path to a JSON fixture served by spotify_client.LocalSpotify instead of the real API (tests/dev)
+SPOTIFY_LOCAL_FIXTURES = os.getenv("SPOTIFY_LOCAL_FIXTURES")
+EXTRACTOR_POOL_SIZE = int(os.getenv("EXTRACTOR_POOL_SIZE", "4"))
+# "thread" (default) or "process": run yt-dlp in worker processes to keep it off the bot's GIL
+EXTRACT_BACKEND = os.getenv("EXTRACT_BACKEND", "thread").lower()
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+EXTRACT_MAX_JOBS_PER_WORKER = int(os.getenv("EXTRACT_MAX_JOBS_PER_WORKER", "50"))
+PLAYLIST_BATCH_SIZE = int(os.getenv("PLAYLIST_BATCH_SIZE", "50"))
+# Stream resolution attempts per source before a track is skipped (permanent errors never retry)
+RETRY_BUDGETS = {
+    "youtube": int(os.getenv("YOUTUBE_RETRIES", "3")),
+    "soundcloud": int(os.getenv("SOUNDCLOUD_RETRIES", "3")),
+    "spotify": int(os.getenv("SPOTIFY_RETRIES", "2")),  # mapped tracks already cost a search
+    "other": int(os.getenv("OTHER_RETRIES", "2")),
+}
+RETRY_INITIAL_DELAY = float(os.getenv("RETRY_INITIAL_DELAY", "1"))
+# After a failure, resolve this many upcoming entries at once and play the first that works
+SKIP_AHEAD_CANDIDATES = int(os.getenv("SKIP_AHEAD_CANDIDATES", "3"))
+DEAD_ENTRY_TTL_HOURS = float(os.getenv("DEAD_ENTRY_TTL_HOURS", "24"))
+SEARCH_CACHE_TTL_HOURS = float(os.getenv("SEARCH_CACHE_TTL_HOURS", "168"))
+SEARCH_CACHE_MAX_ROWS = int(os.getenv("SEARCH_CACHE_MAX_ROWS", "50000"))
 
 # -------------------------------------------------------------
 # Intents & Bot
@@ -35,15 +108,50 @@ intents.message_content = bool(os.getenv("ENABLE_MESSAGE_CONTENT_INTENT", "0") =
 intents.guilds = True
 intents.voice_states = True
 
-bot = commands.Bot(command_prefix="!", intents=intents)
+class BoneBot(commands.Bot):
+    async def close(self):
+        # Stop background FFmpeg work while the loop is still around to reap it
+        background = []
+        if audio_cache:
+            background.append(audio_cache.cancel_fills())
+        if loudness:
+            background.append(loudness.cancel())
+        await asyncio.gather(*background)
+        search_cache.flush()
+        await super().close()
+
+bot = BoneBot(command_prefix="!", intents=intents)
 
 # -------------------------------------------------------------
 # Global State
 # -------------------------------------------------------------
-queues: dict[int, list[tuple[str, str]]] = {}     # guild_id -> list[(title, url)]
-voice_clients: dict[int, discord.VoiceClient] = {}# guild_id -> VoiceClient
-last_activity: dict[int, datetime] = {}           # guild_id -> datetime
-playlist_processing_status: dict[int, bool] = {}  # guild_id -> bool
+# Durable copy of every guild's queue and current track, restored on startup
+queue_store = QueueStore(QUEUE_DB, flush_interval=QUEUE_FLUSH_MS / 1000) if QUEUE_PERSIST else None
+# One GuildSession per active guild: queue, voice client, tasks, timers and open sources.
+# Playback transitions (start, skip, track end, seek, stop) run on the session's actor.
+sessions = SessionRegistry(GUILD_MAILBOX_SIZE, queue_store.queue if queue_store else None)
+restore_task: asyncio.Task | None = None
+gap_stats = {"count": 0, "total": 0.0, "max": 0.0}
+resume_stats = {"count": 0, "total": 0.0}
+mix_settings: dict[int, MixSettings] = {}         # guild_id -> live volume/crossfade (kept across sessions)
+
+# Resolved stream URLs keyed by video ID; served until shortly before the signed URL expires
+stream_cache = StreamCache(max_entries=STREAM_CACHE_SIZE, safety_margin=STREAM_CACHE_MARGIN_SECONDS)
+# Local copies of played tracks, filled in the background from the first play
+audio_cache = (
+    AudioCache(AUDIO_CACHE_DIR, AUDIO_CACHE_MAX_MB * 1024 * 1024, max_track_seconds=AUDIO_CACHE_MAX_TRACK_MINUTES * 60)
+    if AUDIO_CACHE_DIR else None
+)
+# Per-track normalization gain, persisted in BONEBOT_DB
+loudness = LoudnessStore(target=LOUDNESS_TARGET_LUFS) if LOUDNESS_NORMALIZE else None
+# Spotify track ID / ISRC -> YouTube video, checked before any search
+spotify_map = SpotifyMap()
+# Tracks that failed permanently (private, removed, blocked) are skipped without extraction
+dead_entries = NegativeCache(ttl=DEAD_ENTRY_TTL_HOURS * 3600)
+# Identical concurrent extractions (same video/search across guilds) share one yt-dlp call
+extract_flights = SingleFlight()
+# Text query -> (title, watch_url), persisted in BONEBOT_DB so Spotify re-queues skip the search
+search_cache = SearchCache(ttl=SEARCH_CACHE_TTL_HOURS * 3600, max_rows=SEARCH_CACHE_MAX_ROWS)
 
 # -------------------------------------------------------------
 # URL matchers / helpers
@@ -78,83 +186,20 @@ yt_dl_options = {
     'extract_flat': 'in_playlist',  # fast playlist enumeration
 }
 
-ytdl = yt_dlp.YoutubeDL(yt_dl_options)
-
-# Optional chunked playlist configs (used by process_remaining_playlist)
-first_ten = {
-    'format': 'm4a/bestaudio/best',
-    'postprocessors': [{
-        'key': 'FFmpegExtractAudio',
-        'preferredcodec': 'm4a',
-        'preferredquality': '140',
-    }],
-    'noplaylist': False,
-    'playlist_items': '2-10',
-    'verbose': False
-}
-eleventofifty = {
-    'format': 'm4a/bestaudio/best',
-    'postprocessors': [{
-        'key': 'FFmpegExtractAudio',
-        'preferredcodec': 'm4a',
-        'preferredquality': '140',
-    }],
-    'noplaylist': False,
-    'playlist_items': '11-50',
-    'verbose': False
-}
-fifty_one_to_one_hundred = {
-    'format': 'm4a/bestaudio/best',
-    'postprocessors': [{
-        'key': 'FFmpegExtractAudio',
-        'preferredcodec': 'm4a',
-        'preferredquality': '140',
-    }],
-    'noplaylist': False,
-    'playlist_items': '51-100',
-    'verbose': False
-}
-one_hundred_to_two_hundred = {
-    'format': 'm4a/bestaudio/best',
-    'postprocessors': [{
-        'key': 'FFmpegExtractAudio',
-        'preferredcodec': 'm4a',
-        'preferredquality': '140',
-    }],
-    'noplaylist': False,
-    'playlist_items': '101-200',
-    'verbose': False
-}
-two_hundred_to_three_hundred = {
-    'format': 'm4a/bestaudio/best',
-    'postprocessors': [{
-        'key': 'FFmpegExtractAudio',
-        'preferredcodec': 'm4a',
-        'preferredquality': '140',
-    }],
-    'noplaylist': False,
-    'playlist_items': '201-300',
-    'verbose': False
-}
-from_three_hundred_on = {
-    'format': 'm4a/bestaudio/best',
-    'postprocessors': [{
-        'key': 'FFmpegExtractAudio',
-        'preferredcodec': 'm4a',
-        'preferredquality': '140',
-    }],
-    'noplaylist': False,
-    'playliststart': '301',
-    'verbose': False
+# YTDL instances, pooled per profile so worker threads never share one.
+# ignoreerrors only suits enumeration (one bad entry mustn't sink a playlist); single-item
+# profiles must raise, so a private/removed video's error text reaches the dead-entry cache.
+EXTRACTOR_PROFILES = {
+    "single": {**yt_dl_options, "noplaylist": True, "ignoreerrors": False},  # one video/track -> stream URL
+    "search": {**yt_dl_options, "noplaylist": True, "ignoreerrors": False},  # ytsearch1: text queries
+    "flat": yt_dl_options,                                                   # playlist-aware, flat entries
 }
 
-# YTDL instances
-opt1 = yt_dlp.YoutubeDL(first_ten)
-opt2 = yt_dlp.YoutubeDL(eleventofifty)
-opt3 = yt_dlp.YoutubeDL(fifty_one_to_one_hundred)
-opt4 = yt_dlp.YoutubeDL(one_hundred_to_two_hundred)
-opt5 = yt_dlp.YoutubeDL(two_hundred_to_three_hundred)
-opt6 = yt_dlp.YoutubeDL(from_three_hundred_on)
+extractor_pool = ExtractorPool(EXTRACTOR_PROFILES, size=EXTRACTOR_POOL_SIZE)
+process_extractor = (
+    ProcessExtractor(EXTRACTOR_PROFILES, workers=EXTRACT_WORKERS, max_jobs_per_worker=EXTRACT_MAX_JOBS_PER_WORKER)
+    if EXTRACT_BACKEND == "process" else None
+)
 
 # FFMPEG options
 ffmpeg_options = {
@@ -165,28 +210,75 @@ ffmpeg_options = {
         '-rw_timeout 15000000 '           # 15s I/O timeout
         '-analyzeduration 0 -probesize 32k'  # fast start
     ),
-    'options': '-vn -filter:a "volume=0.25"'
+    'options': f'-vn -filter:a "volume={PLAYBACK_VOLUME}"'
+}
+# Local files from the audio cache: network options don't apply (and FFmpeg rejects them)
+local_ffmpeg_options = {
+    'before_options': '-nostdin -hide_banner -loglevel warning',
+    'options': ffmpeg_options['options'],
 }
 
+playback_counts = {"passthrough": 0, "transcode": 0, "mixed": 0}
+
+def _audio_source(source: str, acodec: str | None, local: bool = False, gain: float = 1.0,
+                  start_at: float = 0.0) -> discord.AudioSource:
+    """
+    Build the FFmpeg player, skipping the transcode when passthrough mode meets an Opus source.
+    `gain` is the track's loudness correction; transcode mode folds it into the volume filter.
+    `start_at` seeks the input (seconds) before decoding starts.
+    """
+    base = local_ffmpeg_options if local else ffmpeg_options
+    if gain != 1.0:
+        base = {**base, 'options': f'-vn -filter:a "volume={PLAYBACK_VOLUME * gain:.4f}"'}
+    if start_at > 0:
+        base = {**base, 'before_options': f"-ss {start_at:.2f} {base['before_options']}"}
+    if PLAYBACK_MODE == "mixer":
+        playback_counts["mixed"] += 1
+        return discord.FFmpegPCMAudio(source, before_options=base['before_options'], options='-vn')
+    if PLAYBACK_MODE == "passthrough" and (acodec or "").startswith("opus"):
+        playback_counts["passthrough"] += 1
+        return discord.FFmpegOpusAudio(source, codec="copy", before_options=base['before_options'], options='-vn')
+    playback_counts["transcode"] += 1
+    return discord.FFmpegOpusAudio(source, **base)
+
 # -------------------------------------------------------------
 # Background idle disconnect task
 # -------------------------------------------------------------
 @tasks.loop(minutes=1)
 async def check_idle():
-    now = datetime.now()
-    for guild_id, vc in list(voice_clients.items()):
-        if not vc or not vc.is_connected():
-            continue
-        last = last_activity.get(guild_id, now)
-        if (now - last) > timedelta(minutes=IDLE_TIMEOUT_MINUTES) and not vc.is_playing():
-            try:
-                await vc.disconnect(force=False)
-            except Exception:
-                pass
-            voice_clients.pop(guild_id, None)
-            queues.pop(guild_id, None)
-            playlist_processing_status.pop(guild_id, None)
-            print(f"[idle] Auto-disconnected from guild {guild_id} due to inactivity.")
+    for session in sessions:
+        if _is_idle(session):
+            session.actor.post(_close_if_idle, session)
+
+def _is_idle(session: GuildSession) -> bool:
+    vc = session.voice_client
+    if vc and vc.is_connected() and vc.is_playing():
+        return False
+    return datetime.now() - session.last_activity > timedelta(minutes=IDLE_TIMEOUT_MINUTES)
+
+async def _close_if_idle(session: GuildSession):
+    if not _is_idle(session):
+        return  # a command arrived while this was queued
+    vc = session.voice_client
+    connected = vc is not None and vc.is_connected()
+    await _close_session(session)
+    if connected:
+        print(f"[idle] Auto-disconnected from guild {session.guild_id} due to inactivity.")
+
+@tasks.loop(minutes=1)
+async def refresh_spotify_token():
+    # Renew the client-credentials token before it expires so /play never waits on auth
+    if SPOTIFY_LOCAL_FIXTURES or not os.getenv("SPOTIFY_CLIENT_ID"):
+        return
+    sp, _ = _get_spotify_client()
+    if sp is None or _spotify_manager is None:
+        return
+    loop = asyncio.get_running_loop()
+    try:
+        if await loop.run_in_executor(None, _spotify_manager.refresh_if_expiring):
+            print("[spotify] Refreshed access token.")
+    except Exception as e:
+        print(f"[spotify] Token refresh failed: {e}")
 
 @bot.event
 async def on_ready():
@@ -201,46 +293,269 @@ async def on_ready():
             print(f"Synced {len(cmds)} global command(s).")
     except Exception as e:
         print(f"Failed to sync commands: {e}")
+    # Pre-build the hot extractor profiles off the event loop
+    if process_extractor is None:
+        loop = asyncio.get_running_loop()
+        loop.run_in_executor(None, extractor_pool.warm_up, ["single", "search", "flat"])
     check_idle.start()
+    if not refresh_spotify_token.is_running():
+        refresh_spotify_token.start()
+    if queue_store:
+        global restore_task
+        if restore_task is None:  # on_ready also fires after gateway reconnects
+            restore_task = asyncio.create_task(_restore_sessions())
+        if not save_positions.is_running():
+            save_positions.start()
     print("Ready")
 
+@tasks.loop(seconds=QUEUE_SAVE_POSITION_SECONDS)
+async def save_positions():
+    # Keep the stored position of playing tracks fresh so a crash resumes close to where it was
+    for session in sessions:
+        if session.now_playing:
+            _save_playback(session)
+
+class _Announcer:
+    """
+    Stands in for the slash-command interaction when playback is restored after a restart:
+    messages go to the text channel /play was last used in, if it still exists.
+    """
+
+    def __init__(self, guild_id: int, channel):
+        self.guild_id = guild_id
+        self.channel = channel
+        self.channel_id = channel.id if channel else None
+        self.followup = self
+
+    async def send(self, content: str):
+        if self.channel is None:
+            return
+        try:
+            await self.channel.send(content)
+        except discord.HTTPException as e:
+            print(f"[restore] Could not announce in guild {self.guild_id}: {e}")
+
+async def _restore_sessions():
+    """Rebuild the queues saved before the last shutdown or crash, rejoin voice and resume playback."""
+    saved = await asyncio.get_running_loop().run_in_executor(None, queue_store.load)
+    restored = 0
+    for guild_id, queue, voice_id, text_id, current, position in saved:
+        if guild_id in sessions:
+            continue  # someone used /play first; their session has already replaced the saved queue
+        channel = bot.get_channel(voice_id) if voice_id else None
+        if not isinstance(channel, (discord.VoiceChannel, discord.StageChannel)) or not (queue or current):
+            queue_store.forget(guild_id)
+            continue
+        if current:
+            queue.insert(0, current)
+        session = sessions.open(guild_id)
+        session.queue = queue_store.queue(guild_id, queue)
+        announcer = _Announcer(guild_id, bot.get_channel(text_id) if text_id else None)
+        session.actor.post(_join_and_start, announcer, session, channel, position if current else 0.0)
+        restored += 1
+    if saved:
+        print(f"[restore] Restored {restored} of {len(saved)} saved queue(s).")
+
 # -------------------------------------------------------------
 # Helpers
 # -------------------------------------------------------------
-def cleanup_guild_state(guild_id: int):
-    queues.pop(guild_id, None)
-    playlist_processing_status.pop(guild_id, None)
-    last_activity[guild_id] = datetime.now()
+async def _close_session(session: GuildSession):
+    """Empty the queue, leave voice and release the session (/stop and the idle check)."""
+    vc = session.voice_client
+    session.reset()  # empty the queue first so the after-callback has nothing to start
+    if vc and vc.is_connected():
+        try:
+            await vc.disconnect(force=False)
+        except Exception:
+            pass
+    if sessions.get(session.guild_id) is session:
+        sessions.close(session.guild_id)
+        if queue_store:
+            queue_store.forget(session.guild_id)
+
+def _save_playback(session: GuildSession, position: float | None = None):
+    """Record the guild's voice channel and current track (and where it is) for a restart."""
+    if queue_store is None:
+        return
+    vc = session.voice_client
+    current = session.now_playing
+    if position is None:
+        position = current[3].position if current else 0.0
+    queue_store.set_playback(
+        session.guild_id, vc.channel.id if vc and vc.is_connected() else None, session.text_channel_id,
+        (current[1], current[2]) if current else None, position,
+    )
+
+async def _dispatch(interaction: discord.Interaction, session: GuildSession, func, *args):
+    """
+    Run `func(*args)` on the guild's actor and return its result. When the mailbox is full
+    or the session closes first, the user is told and None is returned. The interaction
+    must already be deferred.
+    """
+    try:
+        return await session.actor.submit(func, *args)
+    except MailboxFull:
+        await interaction.followup.send("Still working through earlier commands; try again in a moment.")
+    except MailboxClosed:
+        await interaction.followup.send("Playback was stopped.")
+    except Exception as e:
+        print(f"[actor] {func.__name__} failed in guild {session.guild_id}: {e!r}")
+        await interaction.followup.send("Something went wrong; please try again.")
+    return None
+
+def _queue(guild_id: int):
+    """The guild's queue, or an empty list when it has no session."""
+    session = sessions.get(guild_id)
+    return session.queue if session else []
+
+def _refresh_prefetch(guild_id: int):
+    """Point the guild's prefetcher at whatever is next in the queue (no-op before playback starts)."""
+    session = sessions.get(guild_id)
+    if session and session.prefetcher:
+        session.prefetcher.schedule(session.queue[:session.prefetcher.depth])
+    _schedule_lookahead(guild_id)
+
+def _enqueue(guild_id: int, title: str, url: str):
+    q = sessions.open(guild_id).queue
+    q.append((title, url))
+    if len(q) <= max(PREFETCH_DEPTH, LAZY_RESOLVE_WINDOW):
+        _refresh_prefetch(guild_id)
+
+# ---- Lazy queue entries ----------------------------------------------------
+# Pending entries keep only what is needed to find the track later: the URL is a
+# "spotify:track:<id>[#isrc=<isrc>]" URI and the title is the "artist - title" search string.
+PENDING_PREFIX = "spotify:"
+
+def is_pending(url: str) -> bool:
+    return url.startswith(PENDING_PREFIX)
+
+def _pending_url(track_id: str | None, isrc: str | None, query: str) -> str:
+    if not track_id:
+        return f"spotify:local:{query}"
+    return f"spotify:track:{track_id}#isrc={isrc}" if isrc else f"spotify:track:{track_id}"
+
+def _parse_pending(url: str) -> tuple[str | None, str | None]:
+    """Return (track_id, isrc) from a pending URL; both None for local files."""
+    if not url.startswith("spotify:track:"):
+        return None, None
+    rest, _, frag = url[len("spotify:track:"):].partition("#isrc=")
+    return rest, frag or None
+
+async def _resolve_entry(title: str, url: str) -> tuple[str, str]:
+    """Turn a queue entry into a playable (title, page_url); a no-op for already-resolved entries."""
+    if is_pending(url):
+        track_id, isrc = _parse_pending(url)
+        # the collection's get_many already counted this track's lookup
+        return await _spotify_to_youtube(title, track_id, isrc, after_miss=True)
+    return title, url
+
+async def _prefetch_stream(title: str, url: str) -> str | None:
+    _, page_url = await _resolve_entry(title, url)
+    if audio_cache and audio_cache.peek(page_url):
+        return None  # plays from the local copy; nothing to resolve
+    return await fetch_stream_url(page_url)
+
+def _schedule_lookahead(guild_id: int):
+    session = sessions.get(guild_id)
+    if not session or (session.lookahead_task and not session.lookahead_task.done()):
+        return
+    window = session.queue[:LAZY_RESOLVE_WINDOW]
+    if any(is_pending(url) for _, url in window):
+        session.lookahead_task = asyncio.create_task(_resolve_lookahead(guild_id))
+
+def _replace_pending(guild_id: int, pending: tuple[str, str], resolved) -> bool:
+    """Swap a pending entry for its resolution (or drop it on failure) wherever it now sits."""
+    q = _queue(guild_id)
+    for i, entry in enumerate(q):
+        if entry is pending:
+            if isinstance(resolved, tuple):
+                q[i] = resolved
+            else:
+                print(f"[spotify] Failed to map '{pending[0]}': {resolved}")
+                del q[i]
+            return True
+    return False
+
+async def _map_pending(guild_id: int, pending: list[tuple[str, str]], on_progress=None):
+    """Map pending entries with at most SPOTIFY_MAP_CONCURRENCY searches in flight; slots keep queue order."""
+    done = 0
+    async for entry, resolved in map_ordered(lambda e: _resolve_entry(*e), pending, SPOTIFY_MAP_CONCURRENCY):
+        _replace_pending(guild_id, entry, resolved)
+        done += 1
+        if on_progress:
+            await on_progress(done, len(pending))
+
+async def _resolve_lookahead(guild_id: int):
+    """Resolve pending entries inside the lookahead window in place."""
+    while True:
+        window = _queue(guild_id)[:LAZY_RESOLVE_WINDOW]
+        pending = [e for e in window if is_pending(e[1])]
+        if not pending:
+            return
+        await _map_pending(guild_id, pending)
 
-async def fetch_stream_url(url: str) -> str:
-    """Extract a direct audio URL via yt-dlp off the event loop. Robust for SoundCloud/HLS."""
-    loop = asyncio.get_running_loop()
-    def _extract():
-        return ytdl.extract_info(url, download=False)
-    data = await loop.run_in_executor(None, _extract)
-    if not data:
-        raise Exception("Extractor returned no data.")
+def _flight_key(profile: str, url: str) -> tuple[str, str]:
+    if profile == "single":
+        return profile, cache_key(url)
+    if profile == "search":
+        return profile, normalize_query(url)
+    return profile, url
 
-    # Prefer top-level url if present
-    if data.get("url"):
-        return data["url"]
+async def extract_info(profile: str, url: str) -> dict | None:
+    """
+    Run a yt-dlp extraction for `profile` off the event loop and return its summary
+    (see extraction.summarize). Uses worker processes when EXTRACT_BACKEND=process.
+    Concurrent calls for the same video/query are coalesced into one extraction.
+    """
+    return await extract_flights.do(_flight_key(profile, url), _run_extraction, profile, url)
 
-    # Fallback to requested_formats/formats (common on SoundCloud/HLS)
-    fmts = data.get("requested_formats") or data.get("formats") or []
-    for f in fmts:
-        u = f.get("url")
-        if u:
-            return u
+async def _run_extraction(profile: str, url: str) -> dict | None:
+    if process_extractor is None:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, extractor_pool.extract_summary, profile, url)
+    return await process_extractor.extract(profile, url)
+
+def _cache_stream(page_url: str, summary: dict):
+    """Remember a resolved stream (URL, expiry, codec, duration) for playback of `page_url`."""
+    stream_cache.put(page_url, {
+        "url": summary["url"],
+        "expires_at": summary["expires_at"],
+        "acodec": summary.get("acodec"),
+        "duration": summary.get("duration"),
+    })
 
-    raise Exception("No stream URL found from extractor.")
+async def fetch_stream_url(url: str) -> str:
+    """Extract a direct audio URL via yt-dlp off the event loop. Robust for SoundCloud/HLS."""
+    cached = stream_cache.get(url)
+    if cached:
+        return cached["url"]
 
-async def retry_with_backoff(func, *args, retries=5, initial_delay=2):
+    data = await extract_info("single", url)
+    if not data:
+        raise Exception("Extractor returned no data.")
+    if not data["url"]:
+        raise Exception("No stream URL found from extractor.")
+    _cache_stream(url, data)
+    return data["url"]
+
+def _source_kind(url: str) -> str:
+    if is_pending(url):
+        return "spotify"
+    if is_youtube_url(url):
+        return "youtube"
+    if is_soundcloud_url(url):
+        return "soundcloud"
+    return "other"
+
+async def retry_with_backoff(func, *args, retries=5, initial_delay=2, giveup=None):
     delay = initial_delay
     for attempt in range(retries):
         try:
             return await func(*args)
         except Exception as e:
             print(f"[retry] Attempt {attempt+1}/{retries} failed: {e}")
+            if giveup is not None and giveup(e):
+                raise
             if attempt < retries - 1:
                 await asyncio.sleep(delay)
                 delay *= 2
@@ -257,13 +572,15 @@ async def connect_with_voice_reset(channel: discord.VoiceChannel, guild_id: int)
     except discord.errors.ConnectionClosed as e:
         if getattr(e, "code", None) == 4006:
             # Hard reset: drop any cached VC and force a brand-new session
+            session = sessions.get(guild_id)
             try:
-                vc = voice_clients.get(guild_id)
+                vc = session.voice_client if session else None
                 if vc and vc.is_connected():
                     await vc.disconnect(force=True)
             except Exception:
                 pass
-            voice_clients.pop(guild_id, None)
+            if session:
+                session.voice_client = None
             await asyncio.sleep(1)
             return await channel.connect(reconnect=False)
         raise
@@ -273,32 +590,64 @@ def _clean_title(s: str) -> str:
     # Remove bracketed fluff like (Remastered 2011), [Official Video], etc.
     return re.sub(r'\s*[\(\[\{].*?[\)\]\}]', '', s).strip()
 
+_spotify_manager: spotify_client.SpotifyClientManager | None = None
+_spotify_local: spotify_client.LocalSpotify | None = None
+
 def _get_spotify_client():
-    if spotipy is None:
+    """Return the process-wide Spotify client (built once; token refreshed in the background)."""
+    global _spotify_manager, _spotify_local
+    if SPOTIFY_LOCAL_FIXTURES:
+        if _spotify_local is None:
+            _spotify_local = spotify_client.LocalSpotify(SPOTIFY_LOCAL_FIXTURES)
+        return _spotify_local, None
+    if not spotify_client.available():
         return None, "Spotify support not installed. Run: pip install spotipy"
-    cid = os.getenv("SPOTIFY_CLIENT_ID")
-    sec = os.getenv("SPOTIFY_CLIENT_SECRET")
-    if not cid or not sec:
-        return None, "Set SPOTIFY_CLIENT_ID and SPOTIFY_CLIENT_SECRET in your environment (.env)."
-    auth = SpotifyClientCredentials(client_id=cid, client_secret=sec)
-    return spotipy.Spotify(auth_manager=auth), None
+    if _spotify_manager is None:
+        cid = os.getenv("SPOTIFY_CLIENT_ID")
+        sec = os.getenv("SPOTIFY_CLIENT_SECRET")
+        if not cid or not sec:
+            return None, "Set SPOTIFY_CLIENT_ID and SPOTIFY_CLIENT_SECRET in your environment (.env)."
+        _spotify_manager = spotify_client.SpotifyClientManager(cid, sec)
+    return _spotify_manager.client, None
 
 async def _yt_search_watch_url(query: str) -> tuple[str, str]:
     """Return (title, watch_url) for the best YouTube match."""
-    loop = asyncio.get_running_loop()
-    ytdl_single = yt_dlp.YoutubeDL({**yt_dl_options, "noplaylist": True})
-    data = await loop.run_in_executor(None, lambda: ytdl_single.extract_info(f"ytsearch1:{query}", download=False))
+    cached = search_cache.get(query)
+    if cached:
+        return cached
+    data = await extract_info("search", f"ytsearch1:{query}")
     if not data or not data.get("entries"):
         raise RuntimeError(f"No YouTube results for: {query}")
     e = data["entries"][0]
-    title = e.get("title") or query
-    watch_url = e.get("webpage_url") or (f"https://www.youtube.com/watch?v={e.get('id')}" if e.get("id") else None)
+    title = e["title"] or query
+    watch_url = e["webpage_url"]
     if not watch_url:
         raise RuntimeError("Could not resolve a YouTube watch URL.")
+    search_cache.put(query, title, watch_url)
+    return title, watch_url
+
+async def _spotify_to_youtube(query: str, track_id: str | None = None, isrc: str | None = None,
+                              after_miss: bool = False) -> tuple[str, str]:
+    """
+    Map a Spotify track to (title, watch_url), consulting the persistent mapping before searching.
+    `after_miss`: the caller already counted a mapping miss for this track (see SpotifyMap.get).
+    """
+    hit = spotify_map.get(track_id, isrc, after_miss=after_miss) if (track_id or isrc) else None
+    if hit:
+        return hit
+    title, watch_url = await _yt_search_watch_url(query)
+    if track_id:
+        spotify_map.put(track_id, isrc, title, watch_url)
     return title, watch_url
 
 async def _enqueue_spotify_track(interaction: discord.Interaction, sp, track_id: str):
     guild_id = interaction.guild_id
+    hit = spotify_map.get(track_id)
+    if hit:
+        # Mapped before: no Spotify API call, no YouTube search
+        _enqueue(guild_id, *hit)
+        await interaction.followup.send(f"Added to queue: {hit[0]} (via Spotify)")
+        return
     loop = asyncio.get_running_loop()
     tr = await loop.run_in_executor(None, lambda: sp.track(track_id))
     if not tr:
@@ -306,99 +655,372 @@ async def _enqueue_spotify_track(interaction: discord.Interaction, sp, track_id:
     name = _clean_title(tr.get("name", ""))
     artists = ", ".join(a.get("name") for a in tr.get("artists", []) if a and a.get("name"))
     query = f"{artists} - {name}" if artists else name
-    yt_title, yt_watch = await _yt_search_watch_url(query)
-    queues.setdefault(guild_id, []).append((yt_title, yt_watch))
+    isrc = (tr.get("external_ids") or {}).get("isrc")
+    yt_title, yt_watch = await _spotify_to_youtube(query, track_id, isrc, after_miss=True)
+    _enqueue(guild_id, yt_title, yt_watch)
     await interaction.followup.send(f"Added to queue: {artists} – {name} (via Spotify)")
 
-def _collect_spotify_items(sp, kind: str, obj_id: str) -> list[tuple[str, str]]:
-    """Collect (track_name, artist_names) pairs for a playlist/album."""
-    items: list[tuple[str, str]] = []
+def _artist_names(artists) -> str:
+    return ", ".join(a.get("name") for a in artists or [] if a and a.get("name"))
+
+def _iter_spotify_pages(sp, kind: str, obj_id: str):
+    """Yield one list of (track_name, artist_names, track_id, isrc) tuples per Spotify API page (blocking)."""
     if kind == "playlist":
-        results = sp.playlist_items(obj_id, additional_types=('track',), limit=100)
+        results = sp.playlist_items(
+            obj_id, additional_types=('track',), limit=100,
+            fields="items(track(id,name,artists(name),external_ids(isrc))),next",
+        )
         while results:
+            page = []
             for item in results.get('items', []):
                 tr = (item or {}).get('track') or {}
                 if tr and tr.get('name'):
-                    name = tr['name']
-                    artists = ", ".join(a.get("name") for a in tr.get("artists", []) if a and a.get("name"))
-                    items.append((name, artists))
+                    isrc = (tr.get('external_ids') or {}).get('isrc')
+                    page.append((tr['name'], _artist_names(tr.get("artists")), tr.get('id'), isrc))
+            yield page
             results = sp.next(results) if results.get('next') else None
     elif kind == "album":
-        album = sp.album(obj_id)
-        album_artists = ", ".join(a.get("name") for a in album.get("artists", []) if a and a.get("name"))
-        results = sp.album_tracks(obj_id, limit=50)
+        album = sp.album(obj_id)  # embeds the first page of tracks
+        album_artists = _artist_names(album.get("artists"))
+        results = album.get("tracks")
         while results:
+            page = []
             for tr in results.get('items', []):
                 if tr and tr.get('name'):
-                    name = tr['name']
-                    artists = ", ".join(a.get("name") for a in tr.get('artists', [])) or album_artists
-                    items.append((name, artists))
+                    # Simplified album tracks carry no external_ids, so no ISRC here
+                    page.append((tr['name'], _artist_names(tr.get('artists')) or album_artists, tr.get('id'), None))
+            yield page
             results = sp.next(results) if results.get('next') else None
-    return items
 
-async def _process_spotify_collection(interaction: discord.Interaction, sp, kind: str, obj_id: str, skip_first: int = 1):
-    guild_id = interaction.guild_id
+async def _spotify_pages(sp, kind: str, obj_id: str):
+    """Async view over _iter_spotify_pages; each page is fetched off the event loop when requested."""
     loop = asyncio.get_running_loop()
+    pages = _iter_spotify_pages(sp, kind, obj_id)
+    while (page := await loop.run_in_executor(None, next, pages, None)) is not None:
+        yield page
 
-    def _collect():
-        return _collect_spotify_items(sp, kind, obj_id)
+async def _process_spotify_collection(interaction: discord.Interaction, kind: str,
+                                      first_items: list[tuple[str, str, str | None, str | None]], pages):
+    """
+    Queue the rest of a collection: `first_items` is what remained of the page /play already
+    used, `pages` the same async iterator continuing from the next API page.
+    """
+    guild_id = interaction.guild_id
 
-    meta_list = await loop.run_in_executor(None, _collect)
-    if skip_first:
-        meta_list = meta_list[skip_first:]
-    meta_list = meta_list[skip_first:] if skip_first else meta_list
+    # Queue lightweight pending entries; they are mapped to YouTube only as they near the head
+    added: list[tuple[str, str]] = []
+    known_count = 0  # already resolved via spotify_map
+
+    def _add(items):
+        nonlocal known_count
+        # One bulk lookup per page; known tracks go straight in as resolved entries
+        known = spotify_map.get_many([(track_id, isrc) for _, _, track_id, isrc in items])
+        for name, artists, track_id, isrc in items:
+            if track_id in known:
+                _enqueue(guild_id, *known[track_id])
+                continue
+            query = f"{artists} - {_clean_title(name)}" if artists else _clean_title(name)
+            _enqueue(guild_id, query, _pending_url(track_id, isrc, query))
+            added.append(_queue(guild_id)[-1])
+        known_count += len(known)
 
-    added = 0
-    for name, artists in meta_list:
-        query = f"{artists} - {_clean_title(name)}" if artists else _clean_title(name)
-        try:
-            yt_title, yt_watch = await _yt_search_watch_url(query)
-            queues.setdefault(guild_id, []).append((yt_title, yt_watch))
-            added += 1
-        except Exception as e:
-            print(f"[spotify] Failed to map '{query}': {e}")
+    _add(first_items)
+    try:
+        async for page in pages:
+            _add(page)
+    except Exception as e:
+        print(f"[spotify] Stopped paging {kind}: {e}")
 
-    if added:
-        await interaction.followup.send(f"Queued {added} more from Spotify {kind}.")
+    total = len(added) + known_count
+    if total:
+        await interaction.followup.send(f"Queued {total} more from Spotify {kind}.")
     else:
         await interaction.followup.send(f"No additional playable items found in this Spotify {kind}.")
+        return
+
+    if SPOTIFY_PREMAP and added:
+        await _premap_spotify(interaction, kind, added)
+
+async def _premap_spotify(interaction: discord.Interaction, kind: str, entries: list[tuple[str, str]]):
+    """Map a whole collection in the background, posting progress roughly every quarter."""
+    step = max(25, len(entries) // 4)
+
+    async def _progress(done: int, total: int):
+        if done % step == 0 and done < total:
+            await interaction.followup.send(f"Mapped {done}/{total} tracks from Spotify {kind}...")
+
+    await _map_pending(interaction.guild_id, entries, _progress)
+    await interaction.followup.send(f"Finished mapping Spotify {kind} to YouTube.")
 
 # -------------------------------------------------------------
 # Playback pipeline
 # -------------------------------------------------------------
-async def play_next(interaction: discord.Interaction):
-    guild_id = interaction.guild_id
-    last_activity[guild_id] = datetime.now()
-
-    vc = voice_clients.get(guild_id)
-    if not vc or not vc.is_connected():
-        await interaction.followup.send("Not connected to a voice channel.")
+async def _open_track(session: GuildSession, entry: tuple[str, str], start_at: float = 0.0):
+    """
+    Resolve a queue entry and start its FFmpeg source, which begins prebuffering at once.
+    With `start_at` the stream is opened at that many seconds in (seek / resume).
+    Returns (title, page_url, source, duration_seconds_or_None).
+    """
+    title, url = entry
+    title, page_url = await _resolve_entry(title, url)
+    gain = loudness.gain_for(page_url) if loudness else None
+    local_path = audio_cache.path_for(page_url) if audio_cache else None
+    mixed = PLAYBACK_MODE == "mixer"
+    if local_path:
+        # cache files are always Ogg/Opus
+        player = _audio_source(local_path, "opus", local=True, gain=1.0 if mixed else gain or 1.0, start_at=start_at)
+        if loudness and gain is None:
+            loudness.schedule(page_url, local_path, local_ffmpeg_options['before_options'])
+        duration = audio_cache.duration(page_url) or (stream_cache.peek(page_url) or {}).get("duration")
+    else:
+        if session.prefetcher is None:
+            session.prefetcher = Prefetcher(_prefetch_stream, depth=PREFETCH_DEPTH)
+        prefetched = await session.prefetcher.take(url) if start_at <= 0 else None
+        stream_url = prefetched or await _fetch_with_budget(url, page_url)
+        info = stream_cache.peek(page_url) or {}
+        player = _audio_source(
+            stream_url, info.get("acodec"), gain=1.0 if mixed else gain or 1.0, start_at=start_at
+        )
+        if audio_cache:
+            audio_cache.schedule_fill(
+                page_url, stream_url, info.get("acodec"), info.get("duration"),
+                before_options=ffmpeg_options['before_options'],
+            )
+        if loudness and gain is None:
+            loudness.schedule(page_url, stream_url, ffmpeg_options['before_options'])
+        duration = info.get("duration")
+    source = PrebufferedSource(player, PREBUFFER_FRAMES, start_offset=start_at)
+    if mixed:
+        source = MixerSource(source, _mix_settings(session.guild_id), duration, gain=gain or 1.0)
+    return title, page_url, source, duration
+
+def _mix_settings(guild_id: int) -> MixSettings:
+    return mix_settings.setdefault(guild_id, MixSettings(PLAYBACK_VOLUME, CROSSFADE_SECONDS))
+
+def _schedule_prespawn(session: GuildSession, duration: float | None, position: float = 0.0):
+    lead = PRESPAWN_SECONDS
+    if PLAYBACK_MODE == "mixer" and _mix_settings(session.guild_id).crossfade > 0:
+        lead = max(lead, _mix_settings(session.guild_id).crossfade + 2)  # next source must be warm before the fade
+    if not duration or lead <= 0:
         return
+    loop = asyncio.get_running_loop()
+    session.prespawn_timer = loop.call_later(max(0.0, duration - position - lead), _start_prespawn, session)
 
-    if not queues.get(guild_id):
-        # Queue empty; background idle task will eventually disconnect
-        return
+def _start_prespawn(session: GuildSession):
+    session.prespawn_timer = None
+    task = session.prespawn_task = asyncio.create_task(_prespawn(session))  # held so teardown can cancel it
 
-    next_title, next_url = queues[guild_id].pop(0)
-    try:
-        stream_url = await retry_with_backoff(fetch_stream_url, next_url)
-        player = discord.FFmpegOpusAudio(stream_url, **ffmpeg_options)
+    def _done(t: asyncio.Task):
+        if session.prespawn_task is t:
+            session.prespawn_task = None
 
-        def _after_playback(error):
-            if error:
-                print(f"[player] Error: {error}")
-            # Schedule next track safely from player thread
-            bot.loop.call_soon_threadsafe(asyncio.create_task, play_next(interaction))
+    task.add_done_callback(_done)
 
-        voice_clients[guild_id].play(player, after=_after_playback)
-        await interaction.followup.send(f"Now playing: {next_title}")
+async def _prespawn(session: GuildSession):
+    """Open the head of the queue ahead of time so the handover only swaps sources."""
+    q, vc = session.queue, session.voice_client
+    if not q or not vc or not vc.is_connected() or session.prespawned:
+        return
+    entry = q[0]
+    try:
+        opened = await _open_track(session, entry)
     except Exception as e:
-        print(f"[player] Failed to play {next_title}: {e}")
-        await interaction.followup.send(f"Error playing {next_title}. Skipping...")
-        if queues[guild_id]:
-            await play_next(interaction)
-        else:
-            cleanup_guild_state(guild_id)
+        print(f"[prespawn] Could not open {entry[0]}: {e}")
+        return
+    if sessions.get(session.guild_id) is not session or not session.queue or session.queue[0] is not entry \
+            or session.prespawned:
+        opened[2].cleanup()  # skipped/stopped/reordered while we were opening it
+        return
+    session.prespawned = (entry, *opened)
+    current = vc.source
+    if isinstance(current, MixerSource):
+        current.next = opened[2]  # crossfade into it
+
+def _record_gap(session: GuildSession):
+    ended, session.track_ended_at = session.track_ended_at, None
+    if ended is None:
+        return
+    gap = time.perf_counter() - ended
+    gap_stats["count"] += 1
+    gap_stats["total"] += gap
+    gap_stats["max"] = max(gap_stats["max"], gap)
+
+def _start_playback(interaction: discord.Interaction, session: GuildSession, source: discord.AudioSource):
+    def _after_playback(error):
+        session.track_ended_at = time.perf_counter()
+        if error:
+            print(f"[player] Error: {error}")
+        # Hand the follow-up to the guild's actor from the player thread
+        bot.loop.call_soon_threadsafe(session.actor.post, _track_finished, interaction, session)
+
+    session.voice_client.play(source, after=_after_playback)
+
+def _ended_early(session: GuildSession) -> bool:
+    """True if the current track stopped well before its end without a skip/stop (stream dropped)."""
+    current = session.now_playing
+    if not current:
+        return False
+    _, _, _, source, duration = current
+    tail = RESUME_TAIL_SECONDS
+    if PLAYBACK_MODE == "mixer":
+        tail = max(tail, _mix_settings(session.guild_id).crossfade)
+    return should_resume(duration, source.position, tail, session.resume_attempts, RESUME_ATTEMPTS)
+
+async def _track_finished(interaction: discord.Interaction, session: GuildSession):
+    if sessions.get(session.guild_id) is not session:
+        return  # torn down (stop/idle) while the player was finishing
+    vc = session.voice_client
+    if vc and vc.is_playing():
+        return  # a command queued ahead of this event already started the next track
+    if vc and vc.is_connected() and _ended_early(session) and await _resume(interaction, session):
+        return
+    session.now_playing = None
+    await play_next(interaction)
+
+async def _resume(interaction: discord.Interaction, session: GuildSession) -> bool:
+    """Reopen the current track where it stopped, reusing the cached stream URL when still valid."""
+    entry, title, page_url, old, duration = session.now_playing
+    position = old.position
+    session.resume_attempts += 1
+    if session.resume_attempts > 1:
+        stream_cache.invalidate(page_url)  # the URL itself may be the problem; fetch a fresh one
+    started = time.perf_counter()
+    try:
+        _, _, source, _ = await _open_track(session, (title, page_url), start_at=position)
+        if session.now_playing is None or session.now_playing[0] is not entry:
+            source.cleanup()  # skipped or stopped meanwhile
+            return True
+        session.now_playing = (entry, title, page_url, source, duration)
+        _start_playback(interaction, session, source)
+        _save_playback(session, position)
+    except Exception as e:
+        print(f"[player] Resume of {title} failed: {e}")
+        return False
+    took = time.perf_counter() - started
+    resume_stats["count"] += 1
+    resume_stats["total"] += took
+    print(f"[player] Resumed {title} at {position:.0f}s after the stream dropped ({took * 1000:.0f} ms)")
+    return True
+
+async def _fetch_with_budget(url: str, page_url: str) -> str:
+    """fetch_stream_url with the retry budget of the entry's source; permanent errors fail fast."""
+    return await retry_with_backoff(
+        fetch_stream_url, page_url, retries=max(1, RETRY_BUDGETS[_source_kind(url)]),
+        initial_delay=RETRY_INITIAL_DELAY, giveup=is_permanent_error,
+    )
+
+def _mark_failed(entry: tuple[str, str], page_url: str | None, error: Exception):
+    if is_permanent_error(error):
+        reason = str(error).splitlines()[0][:200]
+        dead_entries.add(entry[1], reason)
+        if page_url and page_url != entry[1]:
+            dead_entries.add(page_url, reason)
+
+def _is_dead(entry: tuple[str, str]) -> bool:
+    return dead_entries.get(entry[1]) is not None
+
+async def _resolve_candidate(entry: tuple[str, str]) -> str:
+    """
+    Resolve an upcoming entry to a stream URL (warming the stream cache), or its audio cache
+    file; raises if unplayable.
+    """
+    title, url = entry
+    page_url = None
+    try:
+        _, page_url = await _resolve_entry(title, url)
+        reason = dead_entries.get(page_url)
+        if reason:
+            raise Exception(reason)
+        local_path = audio_cache.peek(page_url) if audio_cache else None
+        return local_path or await _fetch_with_budget(url, page_url)
+    except Exception as e:
+        _mark_failed(entry, page_url, e)
+        raise
+
+async def _skip_ahead(session: GuildSession, skipped: list[str]):
+    """
+    Resolve the next few entries concurrently and drop the leading ones that fail, so the new
+    head is the first playable track in queue order. Later candidates keep resolving in the
+    background and land in the stream cache.
+    """
+    candidates = session.queue[:SKIP_AHEAD_CANDIDATES]
+    attempts = [asyncio.create_task(_resolve_candidate(e)) for e in candidates]
+    for attempt in attempts:
+        attempt.add_done_callback(lambda t: t.cancelled() or t.exception())  # no "never retrieved" noise
+    for entry, attempt in zip(candidates, attempts):
+        try:
+            await attempt
+            return
+        except Exception as e:
+            print(f"[player] Skipping {entry[0]}: {e}")
+            q = session.queue
+            if q and q[0] is entry:
+                q.popleft()
+                skipped.append(entry[0])
+
+async def play_next(interaction: discord.Interaction, start_at: float = 0.0):
+    """Start the first playable queue entry; `start_at` seconds into it (restore) if given."""
+    guild_id = interaction.guild_id
+    session = sessions.get(guild_id)
+    vc = session.voice_client if session else None
+    if not vc or not vc.is_connected():
+        await interaction.followup.send("Not connected to a voice channel.")
+        return
+    session.touch()
+
+    if session.prespawn_timer:
+        session.prespawn_timer.cancel()
+        session.prespawn_timer = None
+    pre, session.prespawned = session.prespawned, None
+    skipped: list[str] = []
+    # Iterate rather than recurse: each failed entry is dropped and the loop moves on
+    while session.queue:
+        entry = session.queue.popleft()
+        offset, start_at = start_at, 0.0  # only the first entry starts part-way
+        if _is_dead(entry):
+            skipped.append(entry[0])
+            continue
+        next_title = entry[0]
+        page_url = source = None
+        try:
+            if pre and pre[0] is entry:
+                _, next_title, page_url, source, duration = pre
+            else:
+                if pre:
+                    pre[3].cleanup()
+                next_title, page_url, source, duration = await _open_track(session, entry, offset)
+            pre = None
+
+            session.now_playing = (entry, next_title, page_url, source, duration)
+            session.resume_attempts = 0
+            _start_playback(interaction, session, source)
+        except Exception as e:
+            pre = None
+            session.now_playing = None
+            if source is not None:
+                source.cleanup()
+            print(f"[player] Failed to play {next_title}: {e}")
+            _mark_failed(entry, page_url, e)
+            skipped.append(next_title)
+            if sessions.get(guild_id) is not session or not vc.is_connected():
+                return
+            await _skip_ahead(session, skipped)
+            continue
+        _record_gap(session)
+        _refresh_prefetch(guild_id)
+        _schedule_prespawn(session, duration, offset)
+        _save_playback(session, offset)
+        note = f"Skipped {len(skipped)} unavailable track(s). " if skipped else ""
+        await interaction.followup.send(f"{note}Now playing: {next_title}")
+        return
+
+    if pre:
+        pre[3].cleanup()
+    _save_playback(session)
+    if skipped:
+        await interaction.followup.send(f"Skipped {len(skipped)} unavailable track(s); the queue is empty.")
+        session.reset()
+    # Queue empty; background idle task will eventually disconnect
 
 # -------------------------------------------------------------
 # Slash Commands
@@ -407,7 +1029,8 @@ async def play_next(interaction: discord.Interaction):
 @app_commands.describe(query="Song name or URL (YouTube, SoundCloud, Spotify)")
 async def play_cmd(interaction: discord.Interaction, query: str):
     guild_id = interaction.guild_id
-    last_activity[guild_id] = datetime.now()
+    if session := sessions.get(guild_id):
+        session.touch()
 
     if not interaction.user.voice or not interaction.user.voice.channel:
         await interaction.response.send_message("You need to be in a voice channel to use this command.")
@@ -418,6 +1041,7 @@ async def play_cmd(interaction: discord.Interaction, query: str):
 
     # ---------- Resolve the first item BEFORE connecting to voice ----------
     queued_any = False
+    skip_url = None  # video /play queued itself, for the playlist expansion to skip
 
     # Spotify links → map to YouTube and queue
     if is_spotify_url(query):
@@ -437,104 +1061,157 @@ async def play_cmd(interaction: discord.Interaction, query: str):
                 kind = "playlist" if m_pl else "album"
                 obj_id = (m_pl or m_al).group(1)
 
-                # Pull the collection meta and queue the FIRST track immediately
-                loop = asyncio.get_running_loop()
-                def _first():
-                    items = _collect_spotify_items(sp, kind, obj_id)
-                    return items[0] if items else None
-
-                first = await loop.run_in_executor(None, _first)
-                if not first:
+                # Queue the FIRST track as soon as the first API page arrives
+                pages = _spotify_pages(sp, kind, obj_id)
+                first_page = []
+                try:
+                    async for page in pages:
+                        if page:
+                            first_page = page
+                            break
+                except Exception as e:
+                    await interaction.followup.send(f"Could not read that Spotify {kind}: {e}")
+                    return
+                if not first_page:
                     await interaction.followup.send(f"No playable items found in that Spotify {kind}.")
                     return
 
-                name, artists = first
+                name, artists, track_id, isrc = first_page[0]
                 query_first = f"{artists} - {_clean_title(name)}" if artists else _clean_title(name)
-                yt_title, yt_watch = await _yt_search_watch_url(query_first)
-                queues.setdefault(guild_id, []).append((yt_title, yt_watch))
+                yt_title, yt_watch = await _spotify_to_youtube(query_first, track_id, isrc)
+                _enqueue(guild_id, yt_title, yt_watch)
                 await interaction.followup.send(f"Added to queue: {artists} – {name} (via Spotify)")
                 queued_any = True
 
-                # Fetch the rest in the background
-                asyncio.create_task(_process_spotify_collection(interaction, sp, kind, obj_id, skip_first=1))
+                # Page through the rest in the background, continuing the same pagination;
+                # collections queued earlier keep going alongside
+                session = sessions.open(guild_id)
+                task = asyncio.create_task(_process_spotify_collection(interaction, kind, first_page[1:], pages))
+                session.spotify_tasks.add(task)
+                task.add_done_callback(session.spotify_tasks.discard)
             else:
                 await interaction.followup.send("Unsupported Spotify URL.")
                 return
 
-    # SoundCloud links → feed straight to yt-dlp later (we only grab a title for UX)
+    # SoundCloud links → resolved stream URLs are reused at playback (see _soundcloud_tracks)
     elif is_soundcloud_url(query):
-        loop = asyncio.get_running_loop()
-        try:
-            # Get a nice title, but keep the URL as the SoundCloud page
-            meta = await loop.run_in_executor(None, lambda: ytdl.extract_info(query, download=False))
-            title = meta.get("title") or "SoundCloud track"
-        except Exception:
-            title = "SoundCloud track"
-        queues.setdefault(guild_id, []).append((title, query))
-        await interaction.followup.send(f"Added to queue: {title} (SoundCloud)")
+        meta, tracks = await _soundcloud_tracks(query)
+        for t in tracks:
+            page_url = t["webpage_url"] or query
+            if t["url"]:
+                _cache_stream(page_url, t)
+            _enqueue(guild_id, t["title"] or "SoundCloud track", page_url)
+        if not tracks:
+            # Let play_next try again (and report) rather than failing the command here
+            _enqueue(guild_id, "SoundCloud track", query)
+            await interaction.followup.send("Added to queue: SoundCloud track (SoundCloud)")
+        elif meta["entries"] is not None:
+            await interaction.followup.send(
+                f"Added {len(tracks)} tracks from SoundCloud set: {meta['title'] or query}"
+            )
+        else:
+            await interaction.followup.send(f"Added to queue: {tracks[0]['title'] or 'SoundCloud track'} (SoundCloud)")
         queued_any = True
 
     # YouTube link or plain search → original behavior
     else:
-        source = query if is_youtube_url(query) else f"ytsearch1:{query}"
-        ytdl_single = yt_dlp.YoutubeDL({**yt_dl_options, "noplaylist": True})
-        loop = asyncio.get_running_loop()
         try:
-            first_video = await loop.run_in_executor(
-                None, lambda: ytdl_single.extract_info(source, download=False)
-            )
-            if 'entries' in first_video:
-                first_video = first_video['entries'][0]
+            if is_youtube_url(query):
+                first_video = await extract_info("single", query)
+                if first_video["entries"] is not None:
+                    first_video = first_video["entries"][0]
+                title, url = first_video["title"], first_video["webpage_url"]
+                if first_video["url"]:
+                    # Fully resolved already; spare play_next a second extraction
+                    _cache_stream(url, first_video)
+            else:
+                title, url = await _yt_search_watch_url(query)
         except Exception as e:
             await interaction.followup.send(f"Search/extract failed: {e}")
             return
 
-        queues.setdefault(guild_id, []).append((first_video["title"], first_video.get("webpage_url") or first_video.get("url")))
-        await interaction.followup.send(f"Added to queue: {first_video['title']}")
+        _enqueue(guild_id, title, url)
+        await interaction.followup.send(f"Added to queue: {title}")
         queued_any = True
+        skip_url = url
 
     # ---------- Playlist expansion for native YouTube only ----------
     if queued_any and "list=" in query and is_youtube_url(query):
         await interaction.followup.send("Playlist detected. Fetching more songs...")
-        asyncio.create_task(process_remaining_playlist(interaction, query))
+        asyncio.create_task(process_remaining_playlist(interaction, query, skip_url=skip_url))
 
     # ---------- Connect to voice AFTER we have something queued ----------
-    voice_channel = interaction.user.voice.channel
-    existing_vc = voice_clients.get(guild_id)
-    if existing_vc and existing_vc.is_connected():
-        if existing_vc.channel != voice_channel:
-            await existing_vc.move_to(voice_channel)
-        vc = existing_vc
+    session = sessions.open(guild_id)
+    await _dispatch(interaction, session, _join_and_start, interaction, session, interaction.user.voice.channel)
+
+async def _soundcloud_tracks(query: str) -> tuple[dict | None, list[dict]]:
+    """
+    (summary, tracks) for a SoundCloud link. A track comes back fully extracted, stream URL
+    included, in one pass. A set is only listed (flat), and just its first track is extracted
+    so playback can start; the rest resolve through the prefetch window near their turn,
+    before their signed stream URLs would expire.
+    """
+    try:
+        meta = await extract_info("flat", query)
+    except Exception as e:
+        print(f"[soundcloud] Extraction failed for {query}: {e}")
+        return None, []
+    if not meta:
+        return None, []
+    if meta["entries"] is None:
+        return meta, [meta]
+    tracks = list(meta["entries"])
+    if tracks and not tracks[0]["url"]:
+        try:
+            tracks[0] = await extract_info("single", tracks[0]["webpage_url"]) or tracks[0]
+        except Exception as e:
+            print(f"[soundcloud] Could not resolve {tracks[0]['webpage_url']}: {e}")
+    return meta, tracks
+
+async def _join_and_start(interaction: discord.Interaction, session: GuildSession,
+                          channel: discord.VoiceChannel, start_at: float = 0.0):
+    """Connect (or move) to `channel`, then start playback unless a track is playing or ending."""
+    session.text_channel_id = interaction.channel_id
+    vc = session.voice_client
+    if vc and vc.is_connected():
+        if vc.channel != channel:
+            await vc.move_to(channel)
     else:
         try:
-            vc = await connect_with_voice_reset(voice_channel, guild_id)
-            voice_clients[guild_id] = vc
+            vc = session.voice_client = await connect_with_voice_reset(channel, session.guild_id)
         except Exception as e:
             await interaction.followup.send(f"Could not connect to voice channel: {e}")
             return
-
-    # Start playback if nothing is currently playing
-    if not voice_clients[guild_id].is_playing():
-        await play_next(interaction)
+    # now_playing is still set while a finished track's end event waits in the mailbox
+    if not vc.is_playing() and session.now_playing is None:
+        await play_next(interaction, start_at)
 
 @bot.tree.command(name="skip", description="Skip the current track")
 async def skip_cmd(interaction: discord.Interaction):
-    guild_id = interaction.guild_id
-    last_activity[guild_id] = datetime.now()
-    vc = voice_clients.get(guild_id)
-    if not vc or not vc.is_connected():
+    session = sessions.get(interaction.guild_id)
+    if session is None:
         await interaction.response.send_message("Not connected.")
         return
-    if vc.is_playing():
-        vc.stop()
-        await interaction.response.send_message("Skipped.")
-    else:
-        await interaction.response.send_message("Nothing is playing.")
+    await interaction.response.defer()
+    reply = await _dispatch(interaction, session, _skip, session)
+    if reply:
+        await interaction.followup.send(reply)
+
+async def _skip(session: GuildSession) -> str:
+    vc = session.voice_client
+    if not vc or not vc.is_connected():
+        return "Not connected."
+    session.touch()
+    if not vc.is_playing():
+        return "Nothing is playing."
+    session.now_playing = None
+    vc.stop()  # the track-end event plays the next entry
+    return "Skipped."
 
 @bot.tree.command(name="queue", description="Show the current queue")
 async def queue_cmd(interaction: discord.Interaction):
     guild_id = interaction.guild_id
-    q = queues.get(guild_id, [])
+    q = _queue(guild_id)
     if not q:
         await interaction.response.send_message("Queue is empty.")
         return
@@ -543,19 +1220,209 @@ async def queue_cmd(interaction: discord.Interaction):
         msg += f"\n...and {len(q)-20} more"
     await interaction.response.send_message(msg)
 
+def _queue_edited(guild_id: int):
+    """Re-point prefetch/lookahead after the order changed; a stale pre-spawn is dropped at handover."""
+    sessions.get(guild_id).touch()
+    _refresh_prefetch(guild_id)
+
+@bot.tree.command(name="shuffle", description="Shuffle the queue")
+async def shuffle_cmd(interaction: discord.Interaction):
+    q = _queue(interaction.guild_id)
+    if not q:
+        await interaction.response.send_message("Queue is empty.")
+        return
+    q.shuffle()
+    _queue_edited(interaction.guild_id)
+    await interaction.response.send_message(f"Shuffled {len(q)} tracks.")
+
+@bot.tree.command(name="move", description="Move a queued track to another position")
+@app_commands.describe(source="Current position (as shown by /queue)", target="New position")
+async def move_cmd(interaction: discord.Interaction, source: app_commands.Range[int, 1], target: app_commands.Range[int, 1]):
+    q = _queue(interaction.guild_id)
+    if not q or source > len(q):
+        await interaction.response.send_message("No track at that position.")
+        return
+    title = q[source - 1][0]
+    q.move(source - 1, min(target, len(q)) - 1)
+    _queue_edited(interaction.guild_id)
+    await interaction.response.send_message(f"Moved {title} to position {min(target, len(q))}.")
+
+@bot.tree.command(name="remove", description="Remove a track from the queue")
+@app_commands.describe(position="Position as shown by /queue")
+async def remove_cmd(interaction: discord.Interaction, position: app_commands.Range[int, 1]):
+    q = _queue(interaction.guild_id)
+    if not q or position > len(q):
+        await interaction.response.send_message("No track at that position.")
+        return
+    title, _ = q.pop(position - 1)
+    _queue_edited(interaction.guild_id)
+    await interaction.response.send_message(f"Removed {title}.")
+
+@bot.tree.command(name="jump", description="Skip ahead to a position in the queue")
+@app_commands.describe(position="Position as shown by /queue")
+async def jump_cmd(interaction: discord.Interaction, position: app_commands.Range[int, 1]):
+    session = sessions.get(interaction.guild_id)
+    if session is None or position > len(session.queue):
+        await interaction.response.send_message("No track at that position.")
+        return
+    await interaction.response.defer()
+    reply = await _dispatch(interaction, session, _jump, session, position - 1)
+    if reply:
+        await interaction.followup.send(reply)
+
+async def _jump(session: GuildSession, index: int) -> str:
+    q, vc = session.queue, session.voice_client
+    if index >= len(q) or not vc or not vc.is_connected():
+        return "No track at that position."
+    q.jump(index)
+    _queue_edited(session.guild_id)
+    if vc.is_playing():
+        session.now_playing = None
+        vc.stop()  # the track-end event plays the new head
+    return f"Jumping to {q[0][0]}."
+
 @bot.tree.command(name="stop", description="Stop playback and disconnect")
 async def stop_cmd(interaction: discord.Interaction):
-    guild_id = interaction.guild_id
-    vc = voice_clients.get(guild_id)
-    if vc and vc.is_connected():
-        queues[guild_id] = []
-        try:
-            await vc.disconnect(force=False)
-        except Exception:
-            pass
-    voice_clients.pop(guild_id, None)
-    cleanup_guild_state(guild_id)
-    await interaction.response.send_message("Stopped and disconnected.")
+    session = sessions.get(interaction.guild_id)
+    if session is None:
+        await interaction.response.send_message("Stopped and disconnected.")
+        return
+    await interaction.response.defer()
+    # Empty the queue now rather than in turn, so a track being opened ahead of us is the last one started
+    session.reset()
+    try:
+        await session.actor.submit(_close_session, session)
+    except (MailboxFull, MailboxClosed):
+        await _close_session(session)  # tearing down is always allowed
+    await interaction.followup.send("Stopped and disconnected.")
+
+@bot.tree.command(name="seek", description="Jump to a position in the current track")
+@app_commands.describe(position="Seconds, or m:ss / h:mm:ss")
+async def seek_cmd(interaction: discord.Interaction, position: str):
+    session = sessions.get(interaction.guild_id)
+    if session is None or session.now_playing is None:
+        await interaction.response.send_message("Nothing is playing.")
+        return
+    target = parse_timestamp(position)
+    if target is None:
+        await interaction.response.send_message("Use seconds, m:ss or h:mm:ss.", ephemeral=True)
+        return
+    await interaction.response.defer(thinking=True)
+    reply = await _dispatch(interaction, session, _seek, session, target)
+    if reply:
+        await interaction.followup.send(reply)
+
+async def _seek(session: GuildSession, target: float) -> str:
+    vc = session.voice_client
+    current = session.now_playing
+    if not vc or not vc.is_connected() or not current or not (vc.is_playing() or vc.is_paused()):
+        return "Nothing is playing."
+    session.touch()
+    entry, title, page_url, old, duration = current
+    if duration:
+        target = min(target, max(0.0, duration - 1))
+    try:
+        _, _, source, _ = await _open_track(session, (title, page_url), start_at=target)
+    except Exception as e:
+        print(f"[player] Seek in {title} failed: {e}")
+        return "Couldn't seek in this track."
+    if session.now_playing is not current or not vc.is_connected() or vc.source is None:
+        source.cleanup()  # the track ended or the guild stopped while the new stream was opening
+        return "The track changed; seek cancelled."
+    session.drop_prespawn()
+    session.now_playing = (entry, title, page_url, source, duration)
+    vc.source = source  # swaps the running player's source without firing the after-callback
+    bot.loop.call_later(1, old.cleanup)  # let a read already in flight on the player thread finish
+    _schedule_prespawn(session, duration, target)
+    _save_playback(session, target)
+    return f"Seeked to {int(target // 60)}:{int(target % 60):02d}."
+
+@bot.tree.command(name="volume", description="Set the playback volume (applies immediately)")
+@app_commands.describe(percent="0-200, where 100 is the source's own level")
+async def volume_cmd(interaction: discord.Interaction, percent: app_commands.Range[int, 0, 200]):
+    if PLAYBACK_MODE != "mixer":
+        await interaction.response.send_message("Live volume needs PLAYBACK_MODE=mixer.", ephemeral=True)
+        return
+    _mix_settings(interaction.guild_id).volume = percent / 100
+    await interaction.response.send_message(f"Volume set to {percent}%.")
+
+@bot.tree.command(name="crossfade", description="Crossfade between tracks (0 to disable)")
+@app_commands.describe(seconds="Length of the crossfade in seconds")
+async def crossfade_cmd(interaction: discord.Interaction, seconds: app_commands.Range[float, 0, 12]):
+    if PLAYBACK_MODE != "mixer":
+        await interaction.response.send_message("Crossfade needs PLAYBACK_MODE=mixer.", ephemeral=True)
+        return
+    _mix_settings(interaction.guild_id).crossfade = seconds
+    await interaction.response.send_message(f"Crossfade set to {seconds:g}s." if seconds else "Crossfade disabled.")
+
+@bot.tree.command(name="stats", description="Show cache statistics")
+async def stats_cmd(interaction: discord.Interaction):
+    sc = stream_cache.stats()
+    msg = (
+        f"Stream URL cache: {sc['size']} entries, {sc['hits']} hits / {sc['misses']} misses "
+        f"({sc['hit_rate']:.0%}), {sc['evictions']} evicted"
+    )
+    prefetchers = [session.prefetcher for session in sessions if session.prefetcher]
+    pf_hits = sum(pf.hits for pf in prefetchers)
+    pf_misses = sum(pf.misses for pf in prefetchers)
+    msg += f"\nPrefetch (active guilds): {pf_hits} ready / {pf_misses} not ready"
+    msg += f"\nGuild sessions: {len(sessions)} active, {sessions.opened} opened / {sessions.closed} closed"
+    actors = [session.actor for session in sessions]
+    ran = sum(a.processed for a in actors)
+    if ran:
+        waited = sum(a.wait_total for a in actors)
+        msg += (
+            f"\nGuild commands (active guilds): {ran} run, {sum(a.rejected for a in actors)} turned away, "
+            f"queued {waited / ran * 1000:.0f} ms avg / {max(a.wait_max for a in actors) * 1000:.0f} ms max"
+        )
+    ss = search_cache.stats()
+    msg += (
+        f"\nSearch cache: {ss['hits']} hits ({ss['disk_hits']} from disk) / {ss['misses']} misses "
+        f"({ss['hit_rate']:.0%})"
+    )
+    ds = dead_entries.stats()
+    if ds["added"]:
+        msg += f"\nUnavailable tracks: {ds['size']} remembered, {ds['hits']} skipped without extraction"
+    msg += f"\nCoalesced extractions: {extract_flights.shared} of {extract_flights.calls} calls"
+    ms = spotify_map.stats()
+    msg += f"\nSpotify mapping: {ms['size']} tracks known, {ms['hits']} hits / {ms['misses']} misses ({ms['hit_rate']:.0%})"
+    if loudness:
+        ls = loudness.stats()
+        msg += (
+            f"\nLoudness: {ls['size']} tracks measured, {ls['hits']} normalized plays / "
+            f"{ls['misses']} unmeasured ({ls['hit_rate']:.0%})"
+        )
+    if audio_cache:
+        ac = audio_cache.stats()
+        msg += (
+            f"\nAudio cache: {ac['files']} files, {ac['bytes'] / 1048576:.0f}/{AUDIO_CACHE_MAX_MB} MB, "
+            f"{ac['hits']} hits / {ac['misses']} misses ({ac['hit_rate']:.0%}), {ac['fills']} filled"
+        )
+    if queue_store:
+        qs = queue_store.stats()
+        msg += (
+            f"\nQueue persistence: {qs['ops']} changes in {qs['flushes']} batched writes, "
+            f"{qs['compactions']} snapshots, {qs['log_rows']} ops pending compaction"
+        )
+    msg += (
+        f"\nPlayback ({PLAYBACK_MODE}): {playback_counts['passthrough']} passthrough / "
+        f"{playback_counts['transcode']} transcoded / {playback_counts['mixed']} mixed"
+    )
+    if gap_stats["count"]:
+        msg += (
+            f"\nTrack transitions: {gap_stats['count']}, avg gap "
+            f"{gap_stats['total'] / gap_stats['count'] * 1000:.0f} ms, max {gap_stats['max'] * 1000:.0f} ms"
+        )
+    if resume_stats["count"]:
+        msg += (
+            f"\nStream drops recovered: {resume_stats['count']}, avg "
+            f"{resume_stats['total'] / resume_stats['count'] * 1000:.0f} ms to resume"
+        )
+    ps = extractor_pool.stats()
+    msg += f"\nExtractor pool: {ps['created']} built, {ps['checkouts']} checkouts"
+    if process_extractor is not None:
+        msg += f" (process backend: {process_extractor.workers} workers, {process_extractor.jobs} jobs)"
+    await interaction.response.send_message(msg)
 
 # Diagnostic command retained (optional)
 #@bot.tree.command(name="pingvc", description="Test voice connect: join your voice and leave after 2s.")
@@ -575,42 +1442,64 @@ async def stop_cmd(interaction: discord.Interaction):
 # -------------------------------------------------------------
 # Playlist processing (optional / background)
 # -------------------------------------------------------------
-async def process_remaining_playlist(interaction: discord.Interaction, link: str):
-    guild_id = interaction.guild_id
-    playlist_processing_status[guild_id] = True
-    loop = asyncio.get_running_loop()
+def _playlist_page_url(link: str) -> str:
+    """Normalize watch?v=..&list=.. links to the playlist page so enumeration starts at item 1."""
+    m = re.search(r'[?&]list=([A-Za-z0-9_-]+)', link)
+    return f"https://www.youtube.com/playlist?list={m.group(1)}" if m else link
 
-    downloaders = [opt1, opt2, opt3, opt4, opt5, opt6]
+async def process_remaining_playlist(interaction: discord.Interaction, link: str, skip_url: str | None = None):
+    """
+    Enumerate the playlist once in flat mode and enqueue entries page by page as they arrive.
+    The video already queued by /play (`skip_url`) is skipped once. Stops early when the
+    guild is stopped/cleaned up (see GuildSession.cancel_playlists); other playlists queued
+    meanwhile keep enumerating alongside it.
+    """
+    guild_id = interaction.guild_id
+    session = sessions.open(guild_id)
+    stop = threading.Event()
+    session.playlist_stops.add(stop)
+    skip_id = video_id_from_url(skip_url or "")
     titles_added = 0
 
-    async def _extract(dl, url):
-        return await loop.run_in_executor(None, lambda: dl.extract_info(url, download=False))
+    loop = asyncio.get_running_loop()
+    batches: asyncio.Queue = asyncio.Queue()
 
+    def _enumerate():
+        # Worker thread: page through the playlist, handing each batch to the event loop
+        try:
+            for batch in extractor_pool.iter_playlist("flat", _playlist_page_url(link), PLAYLIST_BATCH_SIZE, stop):
+                loop.call_soon_threadsafe(batches.put_nowait, batch)
+        except Exception as e:
+            print(f"[playlist] Enumeration failed for {link}: {e}")
+        finally:
+            loop.call_soon_threadsafe(batches.put_nowait, None)
+
+    enumerator = loop.run_in_executor(None, _enumerate)
     try:
-        for dl in downloaders:
-            try:
-                info = await _extract(dl, link)
-            except Exception:
-                continue
-            if not info:
-                continue
-            entries = info.get("entries") or []
-            for e in entries:
-                if not e:
-                    continue
-                title = e.get("title")
-                url = e.get("url") or e.get("webpage_url") or e.get("original_url")
+        while (batch := await batches.get()) is not None:
+            if stop.is_set():
+                break
+            for e in batch:
+                title = e["title"]
+                url = e["webpage_url"]
                 if not title or not url:
                     continue
-                queues.setdefault(guild_id, []).append((title, url))
+                if skip_id and e["id"] == skip_id:
+                    skip_id = None
+                    continue
+                _enqueue(guild_id, title, url)
                 titles_added += 1
 
+        if stop.is_set():
+            return
         if titles_added:
             await interaction.followup.send(f"Queued {titles_added} more tracks from the playlist.")
         else:
             await interaction.followup.send("No additional tracks found in the playlist.")
     finally:
-        playlist_processing_status[guild_id] = False
+        stop.set()
+        await enumerator
+        session.playlist_stops.discard(stop)
 
 # -------------------------------------------------------------
 # Run
@@ -618,4 +1507,10 @@ async def process_remaining_playlist(interaction: discord.Interaction, link: str
 if __name__ == "__main__":
     if not TOKEN:
         raise SystemExit("DISCORD_BOT_TOKEN is not set.")
-    bot.run(TOKEN)
+    try:
+        bot.run(TOKEN)
+    finally:
+        if queue_store:
+            queue_store.close()  # commit the last batch so the next start restores it
+        if process_extractor:
+            process_extractor.shutdown()
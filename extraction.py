@@ -0,0 +1,228 @@
+# extraction.py — pooled yt-dlp extractor instances and the optional process-pool backend
+import queue
+import asyncio
+import threading
+import multiprocessing
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import yt_dlp
+
+from stream_cache import parse_expiry
+
+def pick_stream_url(data: dict) -> str | None:
+    # Prefer top-level url if present
+    if data.get("url"):
+        return data["url"]
+
+    # Fallback to requested_formats/formats (common on SoundCloud/HLS)
+    fmts = data.get("requested_formats") or data.get("formats") or []
+    for f in fmts:
+        u = f.get("url")
+        if u:
+            return u
+    return None
+
+def _page_url(e: dict) -> str | None:
+    if e.get("webpage_url"):
+        return e["webpage_url"]
+    if e.get("_type") in ("url", "url_transparent") and e.get("url"):
+        return e["url"]  # flat entry: url is the page, not a stream
+    if e.get("original_url"):
+        return e["original_url"]
+    ie = (e.get("ie_key") or e.get("extractor_key") or "").lower()
+    if e.get("id") and ie.startswith("youtube"):
+        return f"https://www.youtube.com/watch?v={e['id']}"
+    return e.get("url")
+
+def _summarize_one(e: dict) -> dict:
+    flat = e.get("_type") in ("url", "url_transparent")
+    stream_url = None if flat else pick_stream_url(e)
+    return {
+        "id": e.get("id"),
+        "title": e.get("title"),
+        "webpage_url": _page_url(e),
+        "url": stream_url,  # direct media URL, None for flat entries
+        "expires_at": parse_expiry(stream_url) if stream_url else None,
+        "acodec": e.get("acodec"),
+        "duration": e.get("duration"),
+    }
+
+def summarize(info: dict | None) -> dict | None:
+    """
+    Reduce a yt-dlp info dict to the small, picklable shape the bot uses:
+    id/title/webpage_url/url(stream)/expires_at/acodec/duration, plus `entries` for playlists.
+    """
+    if not info:
+        return None
+    out = _summarize_one(info)
+    if info.get("_type") == "playlist" or "entries" in info:
+        out["url"] = out["expires_at"] = None
+        out["entries"] = [_summarize_one(e) for e in (info.get("entries") or []) if e]
+    else:
+        out["entries"] = None
+    return out
+
+class ExtractorPool:
+    """
+    Hands out pre-built YoutubeDL instances per option profile. A YoutubeDL object is not
+    safe to share between threads, so each worker checks one out for the duration of a
+    call and returns it afterwards; if a profile is exhausted a fresh instance is built.
+    """
+
+    def __init__(self, profiles: dict[str, dict], size: int = 4):
+        self.profiles = profiles
+        self.size = size
+        self._idle: dict[str, queue.LifoQueue] = {name: queue.LifoQueue(maxsize=size) for name in profiles}
+        self._lock = threading.Lock()
+        self.created = 0
+        self.checkouts = 0
+
+    def _build(self, profile: str) -> yt_dlp.YoutubeDL:
+        with self._lock:
+            self.created += 1
+        return yt_dlp.YoutubeDL(self.profiles[profile])
+
+    def warm_up(self, profiles: list[str] | None = None) -> None:
+        """Fill the idle pools up front so the first requests don't pay construction cost."""
+        for name in profiles or self.profiles:
+            idle = self._idle[name]
+            while not idle.full():
+                try:
+                    idle.put_nowait(self._build(name))
+                except queue.Full:
+                    break
+
+    @contextmanager
+    def checkout(self, profile: str):
+        idle = self._idle[profile]
+        try:
+            ydl = idle.get_nowait()
+        except queue.Empty:
+            ydl = self._build(profile)
+        with self._lock:
+            self.checkouts += 1
+        try:
+            yield ydl
+        finally:
+            try:
+                idle.put_nowait(ydl)
+            except queue.Full:
+                ydl.close()  # surplus instance from a burst; let it go
+
+    def extract(self, profile: str, url: str):
+        """Blocking extract_info (no download) using a pooled instance; run this in an executor."""
+        with self.checkout(profile) as ydl:
+            return ydl.extract_info(url, download=False)
+
+    def extract_summary(self, profile: str, url: str) -> dict | None:
+        return summarize(self.extract(profile, url))
+
+    def iter_playlist(self, profile: str, url: str, batch_size: int = 50, stop: threading.Event | None = None):
+        """
+        Page through a playlist once, yielding lists of flat entry summaries as pages arrive.
+        With process=False yt-dlp hands back its lazy entry generator, so each continuation
+        page is only fetched when the previous one has been consumed. Blocking: run in a thread.
+        """
+        with self.checkout(profile) as ydl:
+            info = ydl.extract_info(url, download=False, process=False)
+            if not info:
+                return
+            batch = []
+            for e in info.get("entries") or []:
+                if stop is not None and stop.is_set():
+                    return
+                if not e or e.get("_type") == "playlist":
+                    continue
+                batch.append(_summarize_one(e))
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+
+    def stats(self) -> dict:
+        return {
+            "created": self.created,
+            "checkouts": self.checkouts,
+            "idle": {name: q.qsize() for name, q in self._idle.items()},
+        }
+
+# ---- Process-pool backend --------------------------------------------------
+# Each worker process owns a private single-instance pool; only summaries cross the boundary.
+_worker_pool: ExtractorPool | None = None
+
+def _init_worker(profiles: dict[str, dict]) -> None:
+    global _worker_pool
+    _worker_pool = ExtractorPool(profiles, size=1)
+
+def _extract_in_worker(profile: str, url: str) -> dict | None:
+    return _worker_pool.extract_summary(profile, url)
+
+class ProcessExtractor:
+    """
+    Runs extractions in a spawn-based ProcessPoolExecutor so yt-dlp's CPU-bound parsing
+    doesn't hold the bot process's GIL. Workers are recycled after `max_jobs_per_worker`.
+    """
+
+    def __init__(self, profiles: dict[str, dict], workers: int = 2, max_jobs_per_worker: int = 0):
+        self.profiles = profiles
+        self.workers = workers
+        self.max_jobs_per_worker = max_jobs_per_worker or None
+        self.jobs = 0
+        self.restarts = 0
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _ensure(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.profiles,),
+                    max_tasks_per_child=self.max_jobs_per_worker,
+                )
+            return self._executor
+
+    async def _run_on(self, executor: ProcessPoolExecutor, profile: str, url: str) -> dict | None:
+        self.jobs += 1
+        try:
+            return await asyncio.wrap_future(executor.submit(_extract_in_worker, profile, url))
+        except asyncio.CancelledError:
+            if asyncio.current_task().cancelling():
+                raise
+            # The job, not our caller, was cancelled (the pool was shut down under it)
+            raise RuntimeError(f"Extraction of {url} was cancelled by a pool restart") from None
+
+    async def extract(self, profile: str, url: str) -> dict | None:
+        """
+        Summary for `url` from a worker process. If a worker died mid-job (OOM, segfault in a
+        native dep) the pool is restarted once and the job resubmitted.
+        """
+        executor = self._ensure()
+        try:
+            return await self._run_on(executor, profile, url)
+        except BrokenProcessPool:
+            self.reset(executor)
+        return await self._run_on(self._ensure(), profile, url)
+
+    def reset(self, broken: ProcessPoolExecutor | None = None) -> None:
+        """
+        Drop the executor; the next submit starts fresh workers. With `broken`, only if that
+        executor is still the current one, so concurrent callers that saw the same failure
+        don't shut down the replacement another caller already resubmitted to.
+        """
+        with self._lock:
+            executor = self._executor
+            if executor is None or (broken is not None and executor is not broken):
+                return
+            self._executor = None
+            if broken is not None:
+                self.restarts += 1
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self) -> None:
+        self.reset()
@@ -0,0 +1,132 @@
+# loudness.py — one-off loudness measurement per track, stored as a static playback gain
+import json
+import time
+import asyncio
+import threading
+
+import storage
+from stream_cache import cache_key
+
+def parse_loudnorm(stderr: str) -> tuple[float, float] | None:
+    """Pull (integrated LUFS, true peak dBTP) out of FFmpeg's loudnorm print_format=json output."""
+    start = stderr.rfind("{")
+    end = stderr.rfind("}")
+    if start < 0 or end < start:
+        return None
+    try:
+        doc = json.loads(stderr[start:end + 1])
+        integrated, peak = float(doc["input_i"]), float(doc["input_tp"])
+    except (ValueError, KeyError):
+        return None
+    if integrated == float("-inf"):
+        return None  # silence
+    return integrated, peak
+
+def gain_from(integrated: float, true_peak: float, target: float = -14.0,
+              ceiling: float = -1.0, max_boost: float = 12.0) -> float:
+    """Linear gain that brings `integrated` to `target`, without pushing the peak over `ceiling`."""
+    db = target - integrated
+    db = min(db, ceiling - true_peak, max_boost)
+    return 10 ** (db / 20)
+
+class LoudnessStore:
+    """
+    Integrated loudness per track, measured once with FFmpeg's loudnorm analysis pass and
+    kept in the shared SQLite file. Playback only looks the gain up, so normalization costs
+    nothing after the first play. Measurements run in the background, one at a time.
+    """
+
+    def __init__(self, path: str | None = None, target: float = -14.0, max_concurrent: int = 1):
+        self.target = target
+        self._lock = threading.Lock()
+        self._memo: dict[str, float] = {}
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self._running: dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.measured = 0
+        self._db = storage.connect(path)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS loudness ("
+            " track_key TEXT PRIMARY KEY, integrated REAL NOT NULL,"
+            " true_peak REAL NOT NULL, measured_at REAL NOT NULL)"
+        )
+
+    def gain_for(self, url: str) -> float | None:
+        """Static gain for `url`, or None if it hasn't been measured yet."""
+        key = cache_key(url)
+        with self._lock:
+            gain = self._memo.get(key)
+            if gain is None:
+                row = self._db.execute(
+                    "SELECT integrated, true_peak FROM loudness WHERE track_key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    gain = self._memo[key] = gain_from(row[0], row[1], self.target)
+            if gain is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return gain
+
+    def put(self, url: str, integrated: float, true_peak: float) -> float:
+        key = cache_key(url)
+        gain = gain_from(integrated, true_peak, self.target)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO loudness (track_key, integrated, true_peak, measured_at)"
+                " VALUES (?, ?, ?, ?)", (key, integrated, true_peak, time.time())
+            )
+            self._memo[key] = gain
+        return gain
+
+    def schedule(self, url: str, source: str, before_options: str = "") -> None:
+        """Measure `source` (a stream URL or cached file) in the background unless known or running."""
+        key = cache_key(url)
+        if key in self._memo or key in self._running:
+            return
+        task = asyncio.create_task(self._measure(url, source, before_options))
+        self._running[key] = task
+        task.add_done_callback(lambda _t, k=key: self._running.pop(k, None))
+
+    async def _measure(self, url: str, source: str, before_options: str) -> None:
+        async with self._slots:
+            proc = await asyncio.create_subprocess_exec(
+                "ffmpeg", *before_options.split(), "-loglevel", "info",  # loudnorm reports at info level
+                "-i", source, "-vn",
+                "-af", "loudnorm=print_format=json", "-f", "null", "-",
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            try:
+                _, err = await proc.communicate()
+            except asyncio.CancelledError:
+                proc.kill()
+                await proc.wait()
+                raise
+        result = parse_loudnorm(err.decode(errors="replace"))
+        if proc.returncode != 0 or result is None:
+            print(f"[loudness] Analysis failed for {cache_key(url)}")
+            return
+        self.put(url, *result)
+        self.measured += 1
+
+    async def cancel(self) -> None:
+        """Stop running measurements (killing their FFmpeg) and wait for them."""
+        tasks = list(self._running.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        with self._lock:
+            size = self._db.execute("SELECT COUNT(*) FROM loudness").fetchone()[0]
+        return {
+            "size": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "measured": self.measured,
+            "hit_rate": (self.hits / total) if total else 0.0,
+        }
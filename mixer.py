@@ -0,0 +1,168 @@
+# mixer.py — in-process PCM gain and crossfade used by the "mixer" playback mode
+import sys
+import math
+import warnings
+from array import array
+
+import discord
+
+from audio import FRAME_SECONDS
+
+try:
+    import numpy as np
+except ImportError:  # optional; audioop (which discord.py itself needs) covers the common case
+    np = None
+
+try:
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)  # 3.11/3.12; audioop-lts provides it on 3.13+
+        import audioop
+except ImportError:  # pure-Python fallback below; fine for a handful of guilds
+    audioop = None
+
+RAMP_STEPS = 20  # audioop path: a gain ramp is applied in 1 ms steps
+
+class MixSettings:
+    """Per-guild knobs. Sources read them on every frame, so changes apply within 20 ms."""
+
+    def __init__(self, volume: float = 1.0, crossfade: float = 0.0):
+        self.volume = volume
+        self.crossfade = crossfade  # seconds; 0 disables
+
+# Frames are 20 ms of 48 kHz stereo s16le (3840 bytes), as produced by FFmpegPCMAudio.
+def _mix_numpy(a: bytes, a0: float, a1: float, b: bytes | None, b0: float, b1: float) -> bytes:
+    pairs = len(a) // 4
+    out = np.frombuffer(a, dtype="<i2").astype(np.float32)
+    if a0 == a1:
+        out *= a0
+    else:
+        out *= np.repeat(np.linspace(a0, a1, pairs, endpoint=False, dtype=np.float32), 2)
+    if b:
+        other = np.frombuffer(b[:len(a)], dtype="<i2").astype(np.float32)
+        ramp = np.repeat(np.linspace(b0, b1, len(other) // 2, endpoint=False, dtype=np.float32), 2)
+        out[:len(other)] += other * ramp
+    np.clip(out, -32768, 32767, out=out)
+    return out.astype("<i2").tobytes()
+
+def _mix_array(a: bytes, a0: float, a1: float, b: bytes | None, b0: float, b1: float) -> bytes:
+    x = array("h", a)
+    y = array("h", b[:len(a)]) if b else array("h")
+    if sys.byteorder == "big":
+        x.byteswap()
+        y.byteswap()
+    if b is None and a0 == a1:  # the common case: steady volume, no crossfade
+        if abs(a0) <= 1.0:  # can't overflow, skip the clip
+            x = array("h", [int(v * a0) for v in x])
+        else:
+            x = array("h", [min(32767, max(-32768, int(v * a0))) for v in x])
+        if sys.byteorder == "big":
+            x.byteswap()
+        return x.tobytes()
+    pairs = len(x) // 2
+    da = (a1 - a0) / pairs if pairs else 0.0
+    db = (b1 - b0) / pairs if pairs else 0.0
+    for i in range(len(x)):
+        k = i >> 1
+        v = x[i] * (a0 + da * k)
+        if i < len(y):
+            v += y[i] * (b0 + db * k)
+        x[i] = -32768 if v < -32768 else 32767 if v > 32767 else int(v)
+    if sys.byteorder == "big":
+        x.byteswap()
+    return x.tobytes()
+
+def _ramp_audioop(x: bytes, g0: float, g1: float) -> bytes:
+    if g0 == g1:
+        return audioop.mul(x, 2, g0)
+    n = len(x)
+    step = max(4, (n // RAMP_STEPS) & ~3)  # whole stereo sample pairs
+    return b"".join(
+        audioop.mul(x[i:i + step], 2, g0 + (g1 - g0) * (i + step / 2) / n) for i in range(0, n, step)
+    )
+
+def _mix_audioop(a: bytes, a0: float, a1: float, b: bytes | None, b0: float, b1: float) -> bytes:
+    out = _ramp_audioop(a, a0, a1)
+    if b:
+        other = _ramp_audioop(b[:len(a)], b0, b1)
+        out = audioop.add(out, other + bytes(len(out) - len(other)), 2)  # saturates like the other paths
+    return out
+
+def _mixer():
+    if np is not None:
+        return _mix_numpy
+    if audioop is not None and sys.byteorder == "little":  # audioop works in native order
+        return _mix_audioop
+    return _mix_array
+
+def mix(a: bytes, a0: float, a1: float, b: bytes | None = None, b0: float = 0.0, b1: float = 0.0) -> bytes:
+    """
+    Scale PCM frame `a` by a gain ramping from a0 to a1 across the frame, optionally adding
+    frame `b` ramped from b0 to b1, and clip to int16. Ramping within the frame (per sample,
+    or in 1 ms steps on the audioop path) avoids clicks.
+    """
+    if b is None and a0 == a1 == 1.0:
+        return a
+    return _mixer()(a, a0, a1, b, b0, b1)
+
+def _fade_in(t: float) -> float:
+    return math.sin(min(1.0, max(0.0, t)) * math.pi / 2)
+
+def _fade_out(t: float) -> float:
+    return math.cos(min(1.0, max(0.0, t)) * math.pi / 2)
+
+class MixerSource(discord.AudioSource):
+    """
+    Applies the guild's live volume (times a per-track `gain`) to a PCM source. When `next`
+    is set and the track is within `settings.crossfade` seconds of `duration`, the next
+    track's frames are mixed in on an equal-power curve; the player later hands over to
+    `next`, which carries on from where the crossfade left it.
+    """
+
+    def __init__(self, inner: discord.AudioSource, settings: MixSettings,
+                 duration: float | None = None, gain: float = 1.0):
+        self._inner = inner
+        self.settings = settings
+        self.duration = duration
+        self.gain = gain
+        self.next: MixerSource | None = None
+        self._last: float | None = None  # gain at the end of the previous frame
+
+    def _target(self) -> float:
+        return self.settings.volume * self.gain
+
+    def _read_faded(self, t0: float, t1: float) -> tuple[bytes, float, float]:
+        """Next-track side of a crossfade: raw frame plus the ramp it should be mixed at."""
+        pcm = self._inner.read()
+        target = self._target()
+        self._last = target * _fade_in(t1)
+        return pcm, target * _fade_in(t0), self._last
+
+    def read(self) -> bytes:
+        pos = self.position  # start of this frame
+        pcm = self._inner.read()
+        if not pcm:
+            return b""
+        target = self._target()
+        start = target if self._last is None else self._last
+        self._last = target
+        nxt, fade = self.next, self.settings.crossfade
+        if nxt is None or fade <= 0 or not self.duration:
+            return mix(pcm, start, target)
+        remaining = self.duration - pos
+        if remaining > fade:
+            return mix(pcm, start, target)
+        t0 = 1.0 - remaining / fade
+        t1 = t0 + FRAME_SECONDS / fade
+        other, b0, b1 = nxt._read_faded(t0, t1)
+        return mix(pcm, start * _fade_out(t0), target * _fade_out(t1), other or None, b0, b1)
+
+    def is_opus(self) -> bool:
+        return False
+
+    @property
+    def position(self) -> float:
+        return getattr(self._inner, "position", 0.0)
+
+    def cleanup(self) -> None:
+        self.next = None  # owned by whoever prespawned it
+        self._inner.cleanup()
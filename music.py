@@ -7,6 +7,8 @@ import urllib.parse, urllib.request, re
 from datetime import datetime, timedelta
 import time, random
 
+from playback_queue import PlaybackQueue
+
 youtube_search_base = "https://www.youtube.com/results?"
 queues = {}
 voice_clients = {}
@@ -123,7 +125,7 @@ IDLE_TIMEOUT = 30
 def get_queue(guild_id):
     """Get the queue for a specific guild."""
     if guild_id not in queues:
-        queues[guild_id] = []
+        queues[guild_id] = PlaybackQueue()
     return queues[guild_id]
 
 def add_to_queue(guild_id, title, url):
@@ -182,7 +184,7 @@ async def setup_music_commands(bot):
                 await voice_client.move_to(voice_channel)
 
         if ctx.guild.id not in queues:
-            queues[ctx.guild.id] = []
+            queues[ctx.guild.id] = PlaybackQueue()
 
         try:
             # Handle search query (if it's not a direct link)
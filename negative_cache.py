@@ -0,0 +1,61 @@
+# negative_cache.py — remembers tracks that can't be played so they're skipped instantly
+import re
+import time
+import threading
+from collections import OrderedDict
+
+from stream_cache import cache_key
+
+# yt-dlp wording for failures that no amount of retrying will fix
+PERMANENT_ERROR_RE = re.compile(
+    r"private video|video unavailable|video is (?:no longer |not )?available|video is unavailable"
+    r"|has been removed|members[- ]only|confirm your age|account associated with this video"
+    r"|copyright|not available in your country|HTTP Error 404|HTTP Error 410",
+    re.I,
+)
+
+def is_permanent_error(exc: BaseException) -> bool:
+    """True for extraction errors that mean the track is gone/blocked rather than a network blip."""
+    return bool(PERMANENT_ERROR_RE.search(str(exc)))
+
+class NegativeCache:
+    """
+    Canonical track key -> reason it failed, kept for `ttl` seconds (videos that are private
+    today are rarely public tomorrow, but they can be). Oldest entries drop past `max_entries`.
+    """
+
+    def __init__(self, ttl: float = 86400, max_entries: int = 4096):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.added = 0
+
+    def add(self, url: str, reason: str) -> None:
+        key = cache_key(url)
+        with self._lock:
+            self._data[key] = (time.time() + self.ttl, reason)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+            self.added += 1
+
+    def get(self, url: str) -> str | None:
+        """The recorded failure reason if `url` is known dead, else None."""
+        key = cache_key(url)
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            if item[0] <= time.time():
+                del self._data[key]
+                return None
+            self.hits += 1
+            return item[1]
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        return {"size": len(self._data), "hits": self.hits, "added": self.added}
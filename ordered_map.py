@@ -0,0 +1,39 @@
+# ordered_map.py — bounded-concurrency async map that yields results in input order
+import asyncio
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable
+
+async def map_ordered(fn: Callable[[Any], Awaitable[Any]], items: Iterable[Any],
+                      limit: int = 4) -> AsyncIterator[tuple[Any, Any]]:
+    """
+    Run `fn(item)` for each item with at most `limit` calls in flight, yielding
+    `(item, result)` pairs in the original order. A failed call yields its exception as
+    the result instead of aborting the rest. Closing/cancelling the consumer cancels
+    whatever is still in flight.
+    """
+    it = iter(items)
+    inflight: deque[tuple[Any, asyncio.Task]] = deque()
+
+    def _start_next() -> None:
+        for item in it:
+            inflight.append((item, asyncio.ensure_future(fn(item))))
+            return
+
+    try:
+        for _ in range(max(1, limit)):
+            _start_next()
+        while inflight:
+            item, task = inflight.popleft()
+            try:
+                result = await task
+            except asyncio.CancelledError:
+                if not task.cancelled():
+                    raise
+                result = asyncio.CancelledError()
+            except Exception as e:
+                result = e
+            _start_next()
+            yield item, result
+    finally:
+        for _, task in inflight:
+            task.cancel()
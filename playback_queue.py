@@ -0,0 +1,381 @@
+# playback_queue.py — indexed guild queue: cheap pops at the head, log-time edits anywhere
+import sys
+import random
+from itertools import islice
+
+WATCH_PREFIX = "https://www.youtube.com/watch?v="
+_ID = 11                       # bytes per video ID
+_URL_LEN = len(WATCH_PREFIX) + _ID
+_RAW = bytes(_ID)              # ID slot of an entry kept as-is; only its first byte is ever checked
+
+def _pack(item) -> tuple:
+    """(title, watch URL) -> (interned title, video ID bytes); anything else -> (item, _RAW)."""
+    if type(item) is tuple and len(item) == 2 and type(item[0]) is str and type(item[1]) is str:
+        url = item[1]
+        # the URL is rebuilt from the stored bytes, so any ASCII ID round-trips; a NUL would read as _RAW
+        if len(url) == _URL_LEN and url.startswith(WATCH_PREFIX) and url.isascii() and url[-_ID] != "\0":
+            return sys.intern(item[0]), url[-_ID:].encode("ascii")
+    return item, _RAW
+
+class _Block:
+    """
+    One block of entries as two parallel arrays: `refs` holds the interned title of a
+    (title, watch URL) entry and `ids` its video ID, 11 bytes per slot; any other entry is
+    kept whole in `refs` with a zeroed ID slot. Entries are rebuilt as tuples when read.
+    """
+
+    __slots__ = ("refs", "ids")
+
+    def __init__(self, records=()):
+        self.refs = [ref for ref, _ in records]
+        self.ids = bytearray(b"".join(vid for _, vid in records))
+
+    def __len__(self) -> int:
+        return len(self.refs)
+
+    def get(self, i: int):
+        k = i * _ID
+        ids = self.ids
+        if ids[k]:
+            return (self.refs[i], WATCH_PREFIX + ids[k:k + _ID].decode("ascii"))
+        return self.refs[i]
+
+    def pin(self, i: int):
+        """Entry i, kept whole from now on so every later read returns this same tuple."""
+        k = i * _ID
+        if not self.ids[k]:
+            return self.refs[i]
+        item = self.refs[i] = self.get(i)
+        self.ids[k] = 0
+        return item
+
+    def records(self, start: int = 0) -> list:
+        ids = self.ids
+        return [(ref, bytes(ids[k:k + _ID])) for k, ref in
+                zip(range(start * _ID, len(ids), _ID), islice(self.refs, start, None))]
+
+    def iter_from(self, start: int = 0):
+        ids = self.ids
+        for k, ref in zip(range(start * _ID, len(ids), _ID), islice(self.refs, start, None)):
+            yield (ref, WATCH_PREFIX + ids[k:k + _ID].decode("ascii")) if ids[k] else ref
+
+    __iter__ = iter_from
+
+    def append(self, item) -> None:
+        # _pack inlined: this is the per-entry cost of queueing a playlist
+        if type(item) is tuple and len(item) == 2:
+            title, url = item
+            if type(url) is str and url.startswith(WATCH_PREFIX) and len(url) == _URL_LEN \
+                    and url.isascii() and url[-_ID] != "\0" and type(title) is str:
+                self.refs.append(sys.intern(title))
+                self.ids += url[-_ID:].encode()
+                return
+        self.refs.append(item)
+        self.ids += _RAW
+
+    def insert(self, i: int, item) -> None:
+        ref, vid = _pack(item)
+        self.refs.insert(i, ref)
+        self.ids[i * _ID:i * _ID] = vid
+
+    def set(self, i: int, item) -> None:
+        ref, vid = _pack(item)
+        self.refs[i] = ref
+        self.ids[i * _ID:(i + 1) * _ID] = vid
+
+    def pop(self, i: int):
+        item = self.get(i)
+        del self.refs[i]
+        del self.ids[i * _ID:(i + 1) * _ID]
+        return item
+
+    def take(self, i: int):
+        """Entry i, leaving a spent (None) slot behind."""
+        item = self.get(i)
+        self.refs[i] = None
+        self.ids[i * _ID] = 0
+        return item
+
+    def drop_front(self, n: int) -> None:
+        del self.refs[:n]
+        del self.ids[:n * _ID]
+
+class PlaybackQueue:
+    """
+    List-like queue stored as a sequence of small blocks with a Fenwick tree over their
+    sizes. popleft()/append() are amortized O(1); indexing, insert, remove and move locate
+    their block in O(log n) and then touch at most one block (<= 2 * BLOCK entries).
+    Behaves like the list-of-tuples queues it replaces (len, indexing, slicing, iteration,
+    pop(0), comparison with lists), so existing helpers keep working unchanged.
+    (title, watch URL) entries are stored as an interned title plus 11 video-ID bytes and
+    come back as equal, new tuples; compare them with ==, not `is`, against the tuple that
+    was added. Reading an entry by index or slice keeps that tuple, so repeated reads of a
+    slot (the player's `q[0] is entry` checks) return the same object; iteration doesn't.
+    """
+
+    BLOCK = 512
+
+    def __init__(self, items=()):
+        self._load(list(items))
+
+    # ---- internal layout -------------------------------------------------
+    # Blocks before `_first` are spent; the first `_head` slots of block `_first` were popped
+    # (set to None) but still count in the tree, so popleft never has to touch it.
+    def _load(self, items: list) -> None:
+        self._load_records([_pack(i) for i in items])
+
+    def _load_records(self, records: list) -> None:
+        b = self.BLOCK
+        self._blocks = [_Block(records[i:i + b]) for i in range(0, len(records), b)] or [_Block()]
+        self._first = 0
+        self._head = 0
+        self._len = len(records)
+        self._empty = 0
+        self._build()
+
+    def _build(self) -> None:
+        n = len(self._blocks)
+        tree = [0] * (n + 1)
+        for i, block in enumerate(self._blocks, 1):
+            tree[i] += len(block)
+            j = i + (i & -i)
+            if j <= n:
+                tree[j] += tree[i]
+        self._tree = tree
+
+    def _add(self, block: int, delta: int) -> None:
+        i = block + 1
+        tree = self._tree
+        while i < len(tree):
+            tree[i] += delta
+            i += i & -i
+
+    def _prefix(self, block: int) -> int:
+        """Physical slots in blocks [0, block)."""
+        total, i = 0, block
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def _append_block(self, block: _Block) -> None:
+        self._blocks.append(block)
+        i = len(self._blocks)
+        self._tree.append(len(block) + self._prefix(i - 1) - self._prefix(i - (i & -i)))
+
+    def _locate(self, index: int) -> tuple[int, int]:
+        """Logical index -> (block, offset); index must already be in range."""
+        pos = index + self._head  # blocks before _first are empty
+        block, step = 0, 1 << ((len(self._tree) - 1).bit_length() - 1)
+        tree = self._tree
+        while step:
+            nxt = block + step
+            if nxt < len(tree) and tree[nxt] <= pos:
+                block = nxt
+                pos -= tree[nxt]
+            step >>= 1
+        return block, pos
+
+    def _norm(self, index: int) -> int:
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError("PlaybackQueue index out of range")
+        return index
+
+    def _compact(self) -> None:
+        """Drop spent/empty blocks and rebuild the tree; amortized over the pops that caused it."""
+        blocks = self._blocks
+        live = [_Block(blocks[self._first].records(self._head))] + blocks[self._first + 1:]
+        self._blocks = [b for b in live if b] or [_Block()]
+        self._first = self._head = self._empty = 0
+        self._build()
+
+    def _block_emptied(self, block: int) -> None:
+        if block == self._first:
+            self._advance()
+        else:
+            self._empty += 1
+            if self._empty > 8 and self._empty * 2 > len(self._blocks):
+                self._compact()
+
+    def _advance(self) -> None:
+        """Retire the spent first block(s)."""
+        blocks = self._blocks
+        while self._first < len(blocks) - 1 and self._head >= len(blocks[self._first]):
+            self._add(self._first, -len(blocks[self._first]))
+            blocks[self._first] = _Block()
+            self._first += 1
+            self._head = 0
+            while self._first < len(blocks) - 1 and not blocks[self._first]:
+                self._first += 1
+                self._empty -= 1
+        if self._first > 8 and self._first * 2 > len(blocks):
+            self._compact()
+
+    # ---- queue operations ------------------------------------------------
+    def append(self, item) -> None:
+        last = self._blocks[-1]
+        if len(last.refs) >= self.BLOCK:
+            self._append_block(_Block([_pack(item)]))
+        else:
+            last.append(item)
+            self._tree[-1] += 1  # the last block's node covers no later node
+        self._len += 1
+
+    def extend(self, items) -> None:
+        for item in items:
+            self.append(item)
+
+    def popleft(self):
+        if not self._len:
+            raise IndexError("pop from an empty PlaybackQueue")
+        block = self._blocks[self._first]
+        item = block.take(self._head)
+        self._head += 1
+        self._len -= 1
+        if self._head >= len(block):
+            if self._len == 0:
+                self._load([])
+            else:
+                self._advance()
+        return item
+
+    def insert(self, index: int, item) -> None:
+        """list.insert semantics: out-of-range indexes clamp to the ends."""
+        if index < 0:
+            index = max(0, index + self._len)
+        if index >= self._len:
+            self.append(item)
+            return
+        block, offset = self._locate(index)
+        blocks = self._blocks
+        blocks[block].insert(offset, item)
+        self._add(block, 1)
+        self._len += 1
+        if len(blocks[block]) > 2 * self.BLOCK:
+            self._split(block)
+
+    def _split(self, block: int) -> None:
+        b = self._blocks[block]
+        if block == self._first and self._head:
+            b.drop_front(self._head)  # drop popped placeholders before halving
+            self._add(block, -self._head)
+            self._head = 0
+            if len(b) <= 2 * self.BLOCK:
+                return
+        records = b.records()
+        half = len(records) // 2
+        self._blocks[block:block + 1] = [_Block(records[:half]), _Block(records[half:])]
+        self._build()
+
+    def pop(self, index: int = -1):
+        index = self._norm(index)
+        if index == 0:
+            return self.popleft()
+        block, offset = self._locate(index)
+        item = self._blocks[block].pop(offset)
+        self._add(block, -1)
+        self._len -= 1
+        live = len(self._blocks[block]) - (self._head if block == self._first else 0)
+        if live == 0:
+            self._block_emptied(block)
+        return item
+
+    def move(self, src: int, dst: int) -> None:
+        """Move the entry at `src` so it ends up at index `dst`."""
+        self.insert(dst, self.pop(src))
+
+    def jump(self, index: int) -> list:
+        """Drop (and return) the first `index` entries so the entry at `index` becomes the head."""
+        index = max(0, min(index, self._len))
+        out = []
+        while len(out) < index:
+            block = self._blocks[self._first]
+            take = min(index - len(out), len(block) - self._head)
+            out.extend([block.take(i) for i in range(self._head, self._head + take)])
+            self._head += take
+            self._len -= take
+            if self._head >= len(block):
+                if self._len == 0:
+                    self._load([])
+                    break
+                self._advance()
+        return out
+
+    def shuffle(self, rng: random.Random | None = None) -> None:
+        blocks = self._blocks
+        records = blocks[self._first].records(self._head)
+        for block in islice(blocks, self._first + 1, None):
+            records.extend(block.records())
+        (rng or random).shuffle(records)  # records, not entries: read (kept) tuples stay the same objects
+        self._load_records(records)
+
+    def clear(self) -> None:
+        self._load([])
+
+    # ---- list protocol ---------------------------------------------------
+    def __len__(self) -> int:
+        return self._len
+
+    def __bool__(self) -> bool:
+        return self._len > 0
+
+    def __iter__(self):
+        blocks = self._blocks
+        yield from blocks[self._first].iter_from(self._head)
+        for block in islice(blocks, self._first + 1, None):
+            yield from block
+
+    def iter_from(self, start: int = 0):
+        """Iterate from logical index `start` without walking the entries before it."""
+        if start >= self._len:
+            return
+        block, offset = self._locate(max(0, start))
+        blocks = self._blocks
+        yield from blocks[block].iter_from(offset)
+        for b in islice(blocks, block + 1, None):
+            yield from b
+
+    def _pinned(self, start: int, count: int) -> list:
+        """Entries [start, start + count), each kept as the tuple returned (see pin)."""
+        out = []
+        if count <= 0:
+            return out
+        block, offset = self._locate(start)
+        blocks = self._blocks
+        while len(out) < count:
+            b = blocks[block]
+            out.extend(b.pin(i) for i in range(offset, min(len(b), offset + count - len(out))))
+            block, offset = block + 1, 0
+        return out
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._len)
+            if step != 1:
+                return list(self)[index]
+            return self._pinned(start, stop - start)
+        if index == 0 and self._len:
+            block = self._blocks[self._first]
+            if self._head < len(block):
+                return block.pin(self._head)
+        block, offset = self._locate(self._norm(index))
+        return self._blocks[block].pin(offset)
+
+    def __setitem__(self, index: int, item) -> None:
+        block, offset = self._locate(self._norm(index))
+        self._blocks[block].set(offset, item)
+
+    def __delitem__(self, index: int) -> None:
+        self.pop(index)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (PlaybackQueue, list)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        preview = ", ".join(repr(e) for e in self[:3])
+        more = f", ... ({self._len} entries)" if self._len > 3 else ""
+        return f"PlaybackQueue([{preview}{more}])"
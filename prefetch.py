@@ -0,0 +1,57 @@
+# prefetch.py — per-guild lookahead resolution of upcoming stream URLs
+import asyncio
+
+class Prefetcher:
+    """
+    Resolves the next few queue entries in the background while a track plays.
+    `schedule()` is called with the (title, url) entries that currently come next; anything
+    no longer in that window (skip, stop, queue edits) is cancelled, and new entries get a task.
+    """
+
+    def __init__(self, resolve, depth: int = 2):
+        self._resolve = resolve  # async callable: (title, url) -> stream_url
+        self.depth = depth
+        self._tasks: dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def schedule(self, upcoming: list[tuple[str, str]]) -> None:
+        wanted = {url: title for title, url in upcoming[:self.depth]}
+        for url in list(self._tasks):
+            if url not in wanted:
+                self._tasks.pop(url).cancel()
+        for url, title in wanted.items():
+            if url not in self._tasks:
+                self._tasks[url] = asyncio.create_task(self._run(title, url))
+
+    async def _run(self, title: str, url: str) -> str | None:
+        try:
+            return await self._resolve(title, url)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[prefetch] Failed to resolve {url}: {e}")
+            return None
+
+    async def take(self, url: str) -> str | None:
+        """Return the prefetched stream URL for `url` (waiting if still in flight), or None."""
+        task = self._tasks.pop(url, None)
+        if task is None or task.cancelled():
+            self.misses += 1
+            return None
+        try:
+            result = await task
+        except asyncio.CancelledError:
+            if not task.cancelled():
+                raise
+            result = None
+        if result:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return result
+
+    def invalidate(self) -> None:
+        for task in self._tasks.values():
+            task.cancel()
+        self._tasks.clear()
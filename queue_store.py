@@ -0,0 +1,271 @@
+# queue_store.py — crash-safe guild queues: an append-only op log in SQLite, compacted to snapshots
+import json
+import time
+import threading
+
+import storage
+from playback_queue import PlaybackQueue
+
+def _pair(item) -> list:
+    return [item[0], item[1]]
+
+def _dumps(value) -> str:
+    return json.dumps(value, separators=(",", ":"))
+
+class JournaledQueue(PlaybackQueue):
+    """
+    PlaybackQueue that reports every change to its QueueStore as a small op. Only the
+    guild's current queue is journaled; a queue that was replaced (stop, reset) goes quiet.
+    """
+
+    def __init__(self, store: "QueueStore", guild_id: int, items=()):
+        self._store = None  # _load in __init__ must not journal
+        super().__init__(items)
+        self._store = store
+        self.guild_id = guild_id
+
+    def _log(self, *op) -> None:
+        if self._store is not None:
+            self._store._record(self, op)
+
+    def append(self, item) -> None:
+        super().append(item)
+        self._log("a", *_pair(item))
+
+    def popleft(self):
+        item = super().popleft()
+        self._log("p", 0)
+        return item
+
+    def pop(self, index: int = -1):
+        index = self._norm(index)
+        if index == 0:
+            return self.popleft()
+        item = super().pop(index)
+        self._log("p", index)
+        return item
+
+    def insert(self, index: int, item) -> None:
+        if index < 0:
+            index = max(0, index + len(self))
+        if index >= len(self):
+            self.append(item)
+            return
+        super().insert(index, item)
+        self._log("i", index, *_pair(item))
+
+    def jump(self, index: int) -> list:
+        out = super().jump(index)
+        if out:
+            self._log("j", len(out))
+        return out
+
+    def shuffle(self, rng=None) -> None:
+        super().shuffle(rng)
+        self._snapshot()
+
+    def clear(self) -> None:
+        super().clear()
+        self._snapshot()
+
+    def __setitem__(self, index: int, item) -> None:
+        index = self._norm(index)
+        super().__setitem__(index, item)
+        self._log("s", index, *_pair(item))
+
+    def _snapshot(self) -> None:
+        if self._store is not None:
+            self._store._snapshot(self)
+
+def _replay(entries: list, ops: list) -> PlaybackQueue:
+    q = PlaybackQueue(tuple(e) for e in entries)
+    for op in ops:
+        try:
+            kind = op[0]
+            if kind == "a":
+                q.append((op[1], op[2]))
+            elif kind == "p":
+                q.pop(op[1])
+            elif kind == "i":
+                q.insert(op[1], (op[2], op[3]))
+            elif kind == "j":
+                q.jump(op[1])
+            elif kind == "s":
+                q[op[1]] = (op[2], op[3])
+        except (IndexError, TypeError):
+            print(f"[queue_store] Skipping op that doesn't apply: {op!r}")
+    return q
+
+class QueueStore:
+    """
+    Durable copy of every guild's queue and what it was playing. Mutations only append to an
+    in-memory buffer; a writer thread commits the buffer every `flush_interval` seconds in one
+    transaction, so /play and track changes never wait on disk. Each guild's ops accumulate
+    in `queue_log` until they outnumber its queue (plus `compact_min`); then a snapshot of the
+    queue replaces them, keeping both restore time and file size proportional to the queues.
+    Give it its own database file: SQLite locks per file, and the caches sharing BONEBOT_DB
+    write on the event loop, where they would wait out every batch transaction.
+    """
+
+    def __init__(self, path: str | None = None, flush_interval: float = 0.25, compact_min: int = 256):
+        self.flush_interval = flush_interval
+        self.compact_min = compact_min
+        self._lock = threading.Lock()     # buffers
+        self._db_lock = threading.Lock()  # the connection
+        self._pending: list[tuple] = []                # (kind, guild_id, payload) in mutation order
+        self._playback: dict[int, tuple] = {}          # guild_id -> latest playback row
+        self._current: dict[int, JournaledQueue] = {}  # the queue each guild is journaling
+        self._since_snapshot: dict[int, int] = {}
+        self._wake = threading.Event()
+        self._closed = False
+        self.ops = 0
+        self.flushes = 0
+        self.compactions = 0
+        self._db = storage.connect(path)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS queue_snapshots (guild_id INTEGER PRIMARY KEY, entries TEXT NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS queue_log ("
+            " seq INTEGER PRIMARY KEY AUTOINCREMENT, guild_id INTEGER NOT NULL, op TEXT NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS queue_log_guild ON queue_log(guild_id, seq)")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS queue_playback ("
+            " guild_id INTEGER PRIMARY KEY, voice_channel INTEGER, text_channel INTEGER,"
+            " current TEXT, position REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._thread = threading.Thread(target=self._writer, name="queue-store", daemon=True)
+        self._thread.start()
+
+    # ---- called on the event loop ---------------------------------------
+    def queue(self, guild_id: int, items=()) -> JournaledQueue:
+        """A new journaled queue for `guild_id`, replacing (and silencing) the previous one."""
+        q = JournaledQueue(self, guild_id, items)
+        self._current[guild_id] = q
+        self._snapshot(q)
+        return q
+
+    def _record(self, q: JournaledQueue, op: tuple) -> None:
+        if self._current.get(q.guild_id) is not q:
+            return
+        with self._lock:
+            self._pending.append(("op", q.guild_id, op))
+        self.ops += 1
+        n = self._since_snapshot.get(q.guild_id, 0) + 1
+        self._since_snapshot[q.guild_id] = n
+        if n > len(q) + self.compact_min:
+            self._snapshot(q)
+
+    def _snapshot(self, q: JournaledQueue) -> None:
+        if self._current.get(q.guild_id) is not q:
+            return
+        entries = list(q)  # entries are immutable; encoding happens on the writer thread
+        with self._lock:
+            self._pending.append(("snapshot", q.guild_id, entries))
+        self._since_snapshot[q.guild_id] = 0
+
+    def set_playback(self, guild_id: int, voice_channel_id: int | None, text_channel_id: int | None,
+                     current: tuple[str, str] | None, position: float = 0.0) -> None:
+        """Remember what the guild is playing and where; only the latest value per guild is written."""
+        row = (voice_channel_id, text_channel_id, _dumps(_pair(current)) if current else None, position)
+        with self._lock:
+            self._playback[guild_id] = row
+
+    def forget(self, guild_id: int) -> None:
+        """Drop everything stored for `guild_id` (stopped or left on purpose)."""
+        self._current.pop(guild_id, None)
+        self._since_snapshot.pop(guild_id, None)
+        with self._lock:
+            self._pending.append(("forget", guild_id, None))
+            self._playback.pop(guild_id, None)
+
+    # ---- writer thread ---------------------------------------------------
+    def _writer(self) -> None:
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[queue_store] Flush failed: {e}")
+
+    def flush(self) -> None:
+        """Commit everything buffered so far in one transaction."""
+        with self._db_lock:  # taken first so concurrent flushes commit batches in order
+            with self._lock:
+                pending, self._pending = self._pending, []
+                playback, self._playback = self._playback, {}
+            if not pending and not playback:
+                return
+            self._write(pending, playback)
+        self.flushes += 1
+
+    def _write(self, pending: list[tuple], playback: dict[int, tuple]) -> None:
+        now = time.time()
+        db = self._db
+        db.execute("BEGIN")
+        try:
+            for kind, guild_id, payload in pending:
+                if kind == "op":
+                    db.execute("INSERT INTO queue_log (guild_id, op) VALUES (?, ?)", (guild_id, _dumps(payload)))
+                elif kind == "snapshot":
+                    db.execute("DELETE FROM queue_log WHERE guild_id = ?", (guild_id,))
+                    db.execute(
+                        "INSERT OR REPLACE INTO queue_snapshots (guild_id, entries) VALUES (?, ?)",
+                        (guild_id, _dumps([_pair(e) for e in payload])),
+                    )
+                    self.compactions += 1
+                else:
+                    for table in ("queue_log", "queue_snapshots", "queue_playback"):
+                        db.execute(f"DELETE FROM {table} WHERE guild_id = ?", (guild_id,))
+            for guild_id, row in playback.items():
+                db.execute(
+                    "INSERT OR REPLACE INTO queue_playback"
+                    " (guild_id, voice_channel, text_channel, current, position, updated_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?)", (guild_id, *row, now)
+                )
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            with self._lock:  # keep the batch for the next attempt
+                self._pending[:0] = pending
+                for guild_id, row in playback.items():
+                    self._playback.setdefault(guild_id, row)
+            raise
+
+    def close(self) -> None:
+        """Flush what's left and stop the writer (call on shutdown)."""
+        self._closed = True
+        self._wake.set()
+        self._thread.join(timeout=5)
+        self.flush()
+
+    # ---- restore ---------------------------------------------------------
+    def load(self) -> list[tuple]:
+        """
+        Rebuild every stored guild from its snapshot plus the ops logged after it, as
+        (guild_id, queue, voice_channel_id, text_channel_id, current, position) where
+        `current` is the (title, url) that was playing (already popped from the queue).
+        """
+        with self._db_lock:
+            snapshots = dict(self._db.execute("SELECT guild_id, entries FROM queue_snapshots"))
+            logs: dict[int, list] = {}
+            for guild_id, op in self._db.execute("SELECT guild_id, op FROM queue_log ORDER BY seq"):
+                logs.setdefault(guild_id, []).append(json.loads(op))
+            playback = {
+                row[0]: row[1:] for row in self._db.execute(
+                    "SELECT guild_id, voice_channel, text_channel, current, position FROM queue_playback"
+                )
+            }
+        saved = []
+        for guild_id in snapshots.keys() | logs.keys() | playback.keys():
+            q = _replay(json.loads(snapshots.get(guild_id, "[]")), logs.get(guild_id, []))
+            voice, text, current, position = playback.get(guild_id, (None, None, None, 0.0))
+            saved.append((guild_id, q, voice, text, tuple(json.loads(current)) if current else None, position or 0.0))
+        return saved
+
+    def stats(self) -> dict:
+        with self._db_lock:
+            logged = self._db.execute("SELECT COUNT(*) FROM queue_log").fetchone()[0]
+        return {"ops": self.ops, "flushes": self.flushes, "compactions": self.compactions, "log_rows": logged}
@@ -0,0 +1,25 @@
+# resume.py — /seek timestamps and the decision to reopen a stream that dropped mid-track
+import math
+
+def parse_timestamp(text: str) -> float | None:
+    """'90', '1:30' or '1:02:03' -> seconds; None for anything else (including nan/inf)."""
+    try:
+        parts = [float(p) for p in text.strip().split(":")]
+    except ValueError:
+        return None
+    if not parts or len(parts) > 3 or any(not math.isfinite(p) or p < 0 for p in parts):
+        return None
+    seconds = 0.0
+    for p in parts:
+        seconds = seconds * 60 + p
+    return seconds
+
+def should_resume(duration: float | None, position: float, tail: float,
+                  attempts: int, max_attempts: int) -> bool:
+    """
+    True if a track that stopped at `position` ended well before its `duration` (more than
+    `tail` seconds left) and hasn't used up its resume attempts. Unknown lengths never resume.
+    """
+    if not duration or max_attempts <= 0 or attempts >= max_attempts:
+        return False
+    return duration - position > tail
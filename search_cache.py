@@ -0,0 +1,116 @@
+# search_cache.py — persistent text-query -> (title, watch URL) cache
+import time
+import threading
+from collections import OrderedDict
+
+import storage
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive key so "Artist - Song" and "artist  -  song" share an entry."""
+    return " ".join(query.casefold().split())
+
+class SearchCache:
+    """
+    Two-tier cache for YouTube search results: a small in-memory LRU in front of a SQLite
+    table. Rows older than `ttl` seconds are ignored and purged; the table is trimmed to
+    the `max_rows` most recently used queries. Memory hits are noted and written back to
+    `last_used` in batches (and before every trim), so popular queries count as recent.
+    """
+
+    TOUCH_BATCH = 256  # memory hits buffered before their last_used is written
+
+    def __init__(self, path: str | None = None, ttl: float = 7 * 24 * 3600,
+                 max_rows: int = 50_000, memory_size: int = 1024):
+        self.ttl = ttl
+        self.max_rows = max_rows
+        self.memory_size = memory_size
+        self._mem: OrderedDict[str, tuple[str, str, float]] = OrderedDict()  # key -> (title, url, created_at)
+        self._touched: dict[str, float] = {}  # key -> last memory hit, not yet on disk
+        self._lock = threading.Lock()
+        self._puts = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._db = storage.connect(path)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS search_cache ("
+            " query TEXT PRIMARY KEY, title TEXT NOT NULL, watch_url TEXT NOT NULL,"
+            " created_at REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS search_cache_last_used ON search_cache(last_used)")
+        self._trim(time.time())
+
+    def _remember(self, key: str, row: tuple[str, str, float]) -> None:
+        self._mem[key] = row
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.memory_size:
+            self._mem.popitem(last=False)
+
+    def get(self, query: str) -> tuple[str, str] | None:
+        key = normalize_query(query)
+        now = time.time()
+        with self._lock:
+            row = self._mem.get(key)
+            if row and row[2] + self.ttl > now:
+                self._mem.move_to_end(key)
+                self._touched[key] = now
+                if len(self._touched) >= self.TOUCH_BATCH:
+                    self._flush_touches()
+                self.hits += 1
+                return row[0], row[1]
+            found = self._db.execute(
+                "SELECT title, watch_url, created_at FROM search_cache WHERE query = ?", (key,)
+            ).fetchone()
+            if found and found[2] + self.ttl > now:
+                self._db.execute("UPDATE search_cache SET last_used = ? WHERE query = ?", (now, key))
+                self._remember(key, found)
+                self.hits += 1
+                self.disk_hits += 1
+                return found[0], found[1]
+            self._mem.pop(key, None)
+            self.misses += 1
+            return None
+
+    def put(self, query: str, title: str, watch_url: str) -> None:
+        key = normalize_query(query)
+        now = time.time()
+        with self._lock:
+            self._remember(key, (title, watch_url, now))
+            self._db.execute(
+                "INSERT OR REPLACE INTO search_cache (query, title, watch_url, created_at, last_used)"
+                " VALUES (?, ?, ?, ?, ?)", (key, title, watch_url, now, now)
+            )
+            self._puts += 1
+            if self._puts % 500 == 0:
+                self._trim(now)
+
+    def _flush_touches(self) -> None:
+        touched, self._touched = self._touched, {}
+        if touched:
+            self._db.executemany(
+                "UPDATE search_cache SET last_used = MAX(last_used, ?) WHERE query = ?",
+                [(t, key) for key, t in touched.items()],
+            )
+
+    def flush(self) -> None:
+        """Write buffered memory hits to disk (call on shutdown)."""
+        with self._lock:
+            self._flush_touches()
+
+    def _trim(self, now: float) -> None:
+        self._flush_touches()
+        self._db.execute("DELETE FROM search_cache WHERE created_at < ?", (now - self.ttl,))
+        self._db.execute(
+            "DELETE FROM search_cache WHERE query NOT IN"
+            " (SELECT query FROM search_cache ORDER BY last_used DESC LIMIT ?)", (self.max_rows,)
+        )
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "memory": len(self._mem),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0,
+        }
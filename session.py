@@ -0,0 +1,135 @@
+# session.py — everything the bot holds for one guild, and the registry that owns it
+import asyncio
+import threading
+from datetime import datetime
+
+import discord
+
+from actor import GuildActor
+from playback_queue import PlaybackQueue
+from prefetch import Prefetcher
+
+class GuildSession:
+    """
+    Per-guild playback state: the queue, voice client, background tasks/timers and the
+    sources currently open, plus the actor that serializes transitions on them. reset()
+    drops the playback state but keeps the voice connection; close() releases everything,
+    so a guild that leaves can't keep tasks or FFmpeg alive.
+    """
+
+    __slots__ = (
+        "guild_id", "actor", "new_queue", "queue", "voice_client", "text_channel_id",
+        "last_activity", "playlist_stops", "prefetcher", "lookahead_task", "spotify_tasks",
+        "prespawned", "prespawn_timer", "prespawn_task", "track_ended_at", "now_playing", "resume_attempts",
+    )
+
+    def __init__(self, guild_id: int, mailbox_size: int = 32, new_queue=None):
+        self.guild_id = guild_id
+        self.actor = GuildActor(f"guild {guild_id}", mailbox_size)
+        self.new_queue = new_queue or (lambda _guild_id: PlaybackQueue())  # guild_id -> empty queue
+        self.queue = self.new_queue(guild_id)
+        self.voice_client: discord.VoiceClient | None = None
+        self.text_channel_id: int | None = None              # where /play was last used
+        self.last_activity = datetime.now()
+        self.playlist_stops: set[threading.Event] = set()    # one per running playlist enumeration
+        self.prefetcher: Prefetcher | None = None
+        self.lookahead_task: asyncio.Task | None = None      # resolves pending entries near the head
+        self.spotify_tasks: set[asyncio.Task] = set()        # background Spotify paging/mapping, one per collection
+        self.prespawned: tuple | None = None                 # (queue entry, title, page_url, source, duration)
+        self.prespawn_timer: asyncio.TimerHandle | None = None
+        self.prespawn_task: asyncio.Task | None = None       # opening the prespawned source
+        self.track_ended_at: float | None = None             # perf_counter() when the last track ended
+        self.now_playing: tuple | None = None                # (queue entry, title, page_url, source, duration)
+        self.resume_attempts = 0                             # resumes of the current track
+
+    def touch(self) -> None:
+        self.last_activity = datetime.now()
+
+    @property
+    def playlist_processing(self) -> bool:
+        return bool(self.playlist_stops)
+
+    def cancel_playlists(self) -> None:
+        for stop in self.playlist_stops:
+            stop.set()
+        self.playlist_stops.clear()
+
+    def drop_prefetcher(self) -> None:
+        if self.prefetcher is not None:
+            self.prefetcher.invalidate()
+            self.prefetcher = None
+
+    def cancel_tasks(self) -> None:
+        if self.lookahead_task is not None:
+            self.lookahead_task.cancel()
+        for task in self.spotify_tasks:
+            task.cancel()
+        self.lookahead_task = None
+        self.spotify_tasks.clear()
+
+    def drop_prespawn(self) -> None:
+        if self.prespawn_timer is not None:
+            self.prespawn_timer.cancel()
+            self.prespawn_timer = None
+        if self.prespawn_task is not None:
+            self.prespawn_task.cancel()
+            self.prespawn_task = None
+        pre, self.prespawned = self.prespawned, None
+        if pre is not None:
+            current = self.voice_client.source if self.voice_client else None
+            if getattr(current, "next", None) is pre[3]:
+                current.next = None  # stop a crossfade into it
+            pre[3].cleanup()
+
+    def reset(self) -> None:
+        """Forget the queue and everything hanging off it; the voice connection stays."""
+        self.queue = self.new_queue(self.guild_id)
+        self.cancel_playlists()
+        self.drop_prefetcher()
+        self.cancel_tasks()
+        self.drop_prespawn()
+        self.now_playing = None
+        self.resume_attempts = 0
+        self.touch()
+
+    def close(self) -> None:
+        """Release everything. Disconnect the voice client first; that's async and stops the player."""
+        self.actor.close()
+        self.reset()
+        self.voice_client = None
+        self.track_ended_at = None
+
+class SessionRegistry:
+    """guild_id -> GuildSession; the only place sessions are created or torn down."""
+
+    def __init__(self, mailbox_size: int = 32, new_queue=None):
+        self.mailbox_size = mailbox_size
+        self.new_queue = new_queue
+        self._sessions: dict[int, GuildSession] = {}
+        self.opened = 0
+        self.closed = 0
+
+    def get(self, guild_id: int) -> GuildSession | None:
+        return self._sessions.get(guild_id)
+
+    def open(self, guild_id: int) -> GuildSession:
+        session = self._sessions.get(guild_id)
+        if session is None:
+            session = self._sessions[guild_id] = GuildSession(guild_id, self.mailbox_size, self.new_queue)
+            self.opened += 1
+        return session
+
+    def close(self, guild_id: int) -> None:
+        session = self._sessions.pop(guild_id, None)
+        if session is not None:
+            session.close()
+            self.closed += 1
+
+    def __iter__(self):
+        return iter(list(self._sessions.values()))
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, guild_id: int) -> bool:
+        return guild_id in self._sessions
@@ -0,0 +1,36 @@
+# singleflight.py — coalesce identical concurrent async calls into one
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+class SingleFlight:
+    """
+    In-flight request table: concurrent `do()` calls with the same key share one underlying
+    task. Results and failures fan out to every waiter; nothing is kept once the task
+    finishes, so a failure is never cached and the next call starts a fresh attempt.
+    """
+
+    def __init__(self):
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.shared = 0
+
+    def _done(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved even if every waiter went away
+
+    async def do(self, key: Hashable, fn: Callable[..., Awaitable[Any]], *args) -> Any:
+        self.calls += 1
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn(*args))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, k=key: self._done(k, t))
+        else:
+            self.shared += 1
+        # shield: one waiter being cancelled (e.g. a dropped prefetch) must not cancel the others
+        return await asyncio.shield(task)
+
+    def __len__(self) -> int:
+        return len(self._inflight)
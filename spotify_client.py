@@ -0,0 +1,94 @@
+# spotify_client.py — process-wide Spotify client with pooled HTTP and in-memory token
+import json
+import time
+import threading
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+    import spotipy
+    from spotipy.cache_handler import MemoryCacheHandler
+    from spotipy.oauth2 import SpotifyClientCredentials
+except Exception:
+    spotipy = None  # callers check `available()`
+
+def available() -> bool:
+    return spotipy is not None
+
+class SpotifyClientManager:
+    """
+    Owns one spotipy client for the whole process. Connections are kept alive in a shared
+    requests.Session, and the client-credentials token lives in memory only (no `.cache`
+    file). `refresh_if_expiring()` renews the token ahead of `expires_at` from a background
+    loop so command handlers never wait on the token endpoint.
+    """
+
+    def __init__(self, client_id: str, client_secret: str, refresh_margin: float = 300, pool_size: int = 16):
+        self.refresh_margin = refresh_margin
+        self.refreshes = 0
+        self._lock = threading.Lock()
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size)
+        self._session.mount("https://", adapter)
+        self._cache = MemoryCacheHandler()
+        self._auth = SpotifyClientCredentials(
+            client_id=client_id, client_secret=client_secret,
+            cache_handler=self._cache, requests_session=self._session,
+        )
+        self.client = spotipy.Spotify(auth_manager=self._auth, requests_session=self._session)
+
+    def token_expires_at(self) -> float | None:
+        info = self._cache.get_cached_token()
+        return info.get("expires_at") if info else None
+
+    def refresh_if_expiring(self) -> bool:
+        """Fetch a new token if none is cached or it expires within `refresh_margin`. Blocking."""
+        with self._lock:
+            expires_at = self.token_expires_at()
+            if expires_at and expires_at - time.time() > self.refresh_margin:
+                return False
+            self._auth.get_access_token(as_dict=False, check_cache=False)
+            self.refreshes += 1
+            return True
+
+class LocalSpotify:
+    """
+    Offline stand-in exposing the subset of the spotipy API the bot uses, served from a JSON
+    fixture file: {"tracks": {id: track}, "playlists": {id: [track, ...]},
+    "albums": {id: {"name": ..., "artists": [...], "tracks": [track, ...]}}}.
+    """
+
+    def __init__(self, fixture_path: str, page_size: int = 100):
+        with open(fixture_path, encoding="utf-8") as f:
+            self._data = json.load(f)
+        self.page_size = page_size
+
+    def _page(self, items: list, offset: int, limit: int, wrap: bool) -> dict:
+        chunk = items[offset:offset + limit]
+        nxt = offset + limit if offset + limit < len(items) else None
+        return {
+            "items": [{"track": t} for t in chunk] if wrap else chunk,
+            "next": nxt,
+            "_source": (items, limit, wrap),
+        }
+
+    def track(self, track_id: str) -> dict | None:
+        return self._data.get("tracks", {}).get(track_id)
+
+    def playlist_items(self, playlist_id: str, additional_types=('track',), limit: int = 100, fields=None, offset: int = 0):
+        return self._page(self._data.get("playlists", {}).get(playlist_id, []), offset, min(limit, self.page_size), True)
+
+    def album(self, album_id: str) -> dict:
+        album = dict(self._data.get("albums", {}).get(album_id, {}))
+        album["tracks"] = self._page(album.get("tracks", []), 0, min(50, self.page_size), False)
+        return album
+
+    def album_tracks(self, album_id: str, limit: int = 50, offset: int = 0):
+        tracks = self._data.get("albums", {}).get(album_id, {}).get("tracks", [])
+        return self._page(tracks, offset, min(limit, self.page_size), False)
+
+    def next(self, results: dict) -> dict | None:
+        if results.get("next") is None:
+            return None
+        items, limit, wrap = results["_source"]
+        return self._page(items, results["next"], limit, wrap)
@@ -0,0 +1,95 @@
+# spotify_map.py — persistent Spotify track -> YouTube video mapping
+import time
+import threading
+
+import storage
+
+class SpotifyMap:
+    """
+    Remembers which YouTube video a Spotify track was mapped to. Lookups go by Spotify
+    track ID first and fall back to ISRC, which is shared by the same recording across
+    singles, albums and compilations.
+    """
+
+    def __init__(self, path: str | None = None):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._db = storage.connect(path)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS spotify_map ("
+            " track_id TEXT PRIMARY KEY, isrc TEXT, title TEXT NOT NULL,"
+            " watch_url TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS spotify_map_isrc ON spotify_map(isrc)")
+
+    def get(self, track_id: str | None, isrc: str | None = None, after_miss: bool = False) -> tuple[str, str] | None:
+        """
+        (title, watch_url) for the track, or None. With `after_miss` this lookup repeats one
+        already counted as a miss for the same track (e.g. by ID only, or in get_many): a hit
+        turns that miss into a hit and a miss isn't counted twice.
+        """
+        with self._lock:
+            row = None
+            if track_id:
+                row = self._db.execute(
+                    "SELECT title, watch_url FROM spotify_map WHERE track_id = ?", (track_id,)
+                ).fetchone()
+            if row is None and isrc:
+                row = self._db.execute(
+                    "SELECT title, watch_url FROM spotify_map WHERE isrc = ? LIMIT 1", (isrc,)
+                ).fetchone()
+            if row is None:
+                if not after_miss:
+                    self.misses += 1
+                return None
+            self.hits += 1
+            if after_miss:
+                self.misses -= 1
+            return row[0], row[1]
+
+    def get_many(self, tracks: list[tuple[str | None, str | None]]) -> dict[str, tuple[str, str]]:
+        """Bulk lookup for a page of (track_id, isrc) pairs; returns {track_id: (title, watch_url)} for hits."""
+        ids = [tid for tid, _ in tracks if tid]
+        isrcs = [isrc for _, isrc in tracks if isrc]
+        by_id: dict[str, tuple[str, str]] = {}
+        by_isrc: dict[str, tuple[str, str]] = {}
+        with self._lock:
+            for chunk in range(0, len(ids), 500):
+                part = ids[chunk:chunk + 500]
+                q = f"SELECT track_id, title, watch_url FROM spotify_map WHERE track_id IN ({','.join('?' * len(part))})"
+                for tid, title, url in self._db.execute(q, part):
+                    by_id[tid] = (title, url)
+            for chunk in range(0, len(isrcs), 500):
+                part = isrcs[chunk:chunk + 500]
+                q = f"SELECT isrc, title, watch_url FROM spotify_map WHERE isrc IN ({','.join('?' * len(part))})"
+                for isrc, title, url in self._db.execute(q, part):
+                    by_isrc.setdefault(isrc, (title, url))
+            out = {}
+            for tid, isrc in tracks:
+                if not tid:
+                    continue
+                hit = by_id.get(tid) or (by_isrc.get(isrc) if isrc else None)
+                if hit:
+                    out[tid] = hit
+            self.hits += len(out)
+            self.misses += sum(1 for tid, _ in tracks if tid) - len(out)
+            return out
+
+    def put(self, track_id: str, isrc: str | None, title: str, watch_url: str) -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO spotify_map (track_id, isrc, title, watch_url, created_at)"
+                " VALUES (?, ?, ?, ?, ?)", (track_id, isrc, title, watch_url, time.time())
+            )
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        with self._lock:
+            size = self._db.execute("SELECT COUNT(*) FROM spotify_map").fetchone()[0]
+        return {
+            "size": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0,
+        }
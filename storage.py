@@ -0,0 +1,16 @@
+# storage.py — SQLite helper shared by the bot's persistent caches
+import os
+import sqlite3
+
+DB_PATH = os.getenv("BONEBOT_DB", "bonebot_cache.sqlite3")
+
+def connect(path: str | None = None) -> sqlite3.Connection:
+    """
+    Open a connection to `path` (default BONEBOT_DB) in WAL mode so readers never block on
+    a writer. Each store owns its connection and serializes access with its own lock.
+    """
+    conn = sqlite3.connect(path or DB_PATH, check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=5000")
+    return conn
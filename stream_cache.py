@@ -0,0 +1,136 @@
+# stream_cache.py — TTL-aware LRU cache for resolved stream URLs
+import re
+import json
+import time
+import base64
+import threading
+from collections import OrderedDict
+from urllib.parse import urlparse, parse_qs, parse_qsl, urlencode
+
+# Matches the 11-char video ID in watch/short/embed/live URLs.
+YOUTUBE_ID_RE = re.compile(
+    r'(?:[?&]v=|youtu\.be/|/shorts/|/embed/|/live/)([A-Za-z0-9_-]{11})(?![A-Za-z0-9_-])'
+)
+# googlevideo manifests carry the expiry as a path segment instead of a query param.
+EXPIRE_PATH_RE = re.compile(r'/expire/(\d+)')
+
+def video_id_from_url(url: str) -> str | None:
+    """Return the YouTube video ID for a watch/short/youtu.be URL, or None."""
+    m = YOUTUBE_ID_RE.search(url or "")
+    return m.group(1) if m else None
+
+# Share/referrer parameters: they never select different media, so they stay out of keys
+TRACKING_PARAM_RE = re.compile(r'^(?:utm_\w+|si|feature|fbclid)$')
+
+def cache_key(url: str) -> str:
+    """
+    Canonical key: the video ID for YouTube; otherwise host, path and the query minus tracking
+    parameters (sorted), since the query can pick the media (`playlist?list=...`). No fragment.
+    """
+    vid = video_id_from_url(url)
+    if vid:
+        return f"yt:{vid}"
+    p = urlparse((url or "").strip())
+    params = sorted((k, v) for k, v in parse_qsl(p.query, keep_blank_values=True) if not TRACKING_PARAM_RE.match(k))
+    key = f"{p.netloc.lower()}{p.path.rstrip('/')}"
+    if params:
+        key += "?" + urlencode(params)
+    return key or url
+
+def _policy_expiry(policy: str) -> float | None:
+    # CloudFront custom policy (SoundCloud HLS): URL-safe base64 JSON with a DateLessThan condition
+    try:
+        raw = policy.replace("-", "+").replace("_", "=").replace("~", "/")
+        doc = json.loads(base64.b64decode(raw + "=" * (-len(raw) % 4)))
+        return float(doc["Statement"][0]["Condition"]["DateLessThan"]["AWS:EpochTime"])
+    except (ValueError, KeyError, IndexError, TypeError):
+        return None
+
+def parse_expiry(stream_url: str) -> float | None:
+    """
+    Read the signed URL's expiry (epoch seconds) from `expire=`/`Expires=`, an /expire/ path
+    segment, or a CloudFront `Policy=` document.
+    """
+    try:
+        p = urlparse(stream_url)
+    except ValueError:
+        return None
+    qs = parse_qs(p.query)
+    for name in ("expire", "Expires", "expires"):
+        if qs.get(name):
+            try:
+                return float(qs[name][0])
+            except ValueError:
+                pass
+    m = EXPIRE_PATH_RE.search(p.path)
+    if m:
+        return float(m.group(1))
+    if qs.get("Policy"):
+        return _policy_expiry(qs["Policy"][0])
+    return None
+
+class StreamCache:
+    """
+    Maps canonical track keys to resolved stream info dicts (`{"url": ..., "expires_at": ...}`).
+    Entries are served until `safety_margin` seconds before their signed URL expires, and the
+    least recently used entry is evicted once `max_entries` is exceeded.
+    """
+
+    def __init__(self, max_entries: int = 512, safety_margin: float = 300, default_ttl: float = 1800):
+        self.max_entries = max_entries
+        self.safety_margin = safety_margin
+        self.default_ttl = default_ttl  # used when the URL carries no expiry
+        self._data: OrderedDict[str, dict] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, url: str) -> dict | None:
+        key = cache_key(url)
+        with self._lock:
+            info = self._data.get(key)
+            if info is not None and info["expires_at"] - self.safety_margin > time.time():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return info
+            if info is not None:
+                del self._data[key]  # expired (or about to)
+            self.misses += 1
+            return None
+
+    def peek(self, url: str) -> dict | None:
+        """Like get() but without touching LRU order or hit/miss counters."""
+        info = self._data.get(cache_key(url))
+        return info if info is not None and info["expires_at"] - self.safety_margin > time.time() else None
+
+    def put(self, url: str, info: dict) -> dict:
+        """Store `info` (must contain "url"); fills in `expires_at` from the signed URL if missing."""
+        info = dict(info)
+        if not info.get("expires_at"):
+            info["expires_at"] = parse_expiry(info["url"]) or (time.time() + self.default_ttl)
+        key = cache_key(url)
+        with self._lock:
+            self._data[key] = info
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+        return info
+
+    def invalidate(self, url: str) -> None:
+        with self._lock:
+            self._data.pop(cache_key(url), None)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits / total) if total else 0.0,
+        }
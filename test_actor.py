@@ -0,0 +1,89 @@
+import asyncio
+import pytest
+from actor import GuildActor, MailboxFull, MailboxClosed
+
+def test_commands_run_one_at_a_time_in_order():
+    async def run():
+        actor = GuildActor("test", maxsize=8)
+        log, active = [], []
+
+        async def command(name):
+            active.append(name)
+            assert len(active) == 1  # never overlaps another command
+            await asyncio.sleep(0.01)
+            log.append(name)
+            active.remove(name)
+            return name.upper()
+
+        futures = [actor.submit(command, n) for n in "abcd"]
+        assert await asyncio.gather(*futures) == ["A", "B", "C", "D"]
+        assert log == list("abcd") and actor.processed == 4
+        actor.close()
+
+    asyncio.run(run())
+
+def test_full_mailbox_turns_commands_away_but_not_events():
+    async def run():
+        actor = GuildActor("test", maxsize=2)
+        release = asyncio.Event()
+
+        async def block():
+            await release.wait()
+
+        async def noop():
+            return None
+
+        first = actor.submit(block)
+        await asyncio.sleep(0)  # the actor picks it up; the mailbox is empty again
+        queued = [actor.submit(noop), actor.submit(noop)]
+        with pytest.raises(MailboxFull):
+            actor.submit(noop)
+        actor.post(noop)  # internal events are always accepted
+        assert actor.pending == 3 and actor.rejected == 1
+        release.set()
+        await asyncio.gather(first, *queued)
+        await asyncio.sleep(0)
+        assert actor.pending == 0
+        actor.close()
+
+    asyncio.run(run())
+
+def test_close_from_inside_a_command_fails_the_rest():
+    async def run():
+        actor = GuildActor("test")
+
+        async def stop():
+            actor.close()
+            await asyncio.sleep(0)  # still finishes despite closing its own actor
+            return "stopped"
+
+        async def later():
+            return "ran"
+
+        first, second = actor.submit(stop), actor.submit(later)
+        assert await first == "stopped"
+        with pytest.raises(MailboxClosed):
+            await second
+        with pytest.raises(MailboxClosed):
+            await actor.submit(later)
+
+    asyncio.run(run())
+
+def test_cancelled_await_inside_a_command_does_not_stop_the_actor():
+    async def run():
+        actor = GuildActor("test")
+
+        async def doomed():
+            inner = asyncio.ensure_future(asyncio.sleep(60))
+            asyncio.get_running_loop().call_soon(inner.cancel)
+            await asyncio.shield(inner)
+
+        async def later():
+            return "ran"
+
+        with pytest.raises(RuntimeError):
+            await actor.submit(doomed)
+        assert await asyncio.wait_for(actor.submit(later), 1) == "ran"
+        actor.close()
+
+    asyncio.run(run())
@@ -0,0 +1,46 @@
+import time
+import threading
+import discord
+from audio import PrebufferedSource
+
+class _Inner(discord.AudioSource):
+    def __init__(self, frames, block=None):
+        self.left = frames
+        self.block = block  # threading.Event the reader waits on once frames run out
+        self.cleaned = False
+
+    def read(self):
+        if self.left:
+            self.left -= 1
+            return b"\x01" * 3840
+        if self.block is not None:
+            self.block.wait()
+        return b""
+
+    def is_opus(self):
+        return False
+
+    def cleanup(self):
+        self.cleaned = True
+        if self.block is not None:
+            self.block.set()
+
+def test_prebuffers_and_tracks_position():
+    inner = _Inner(5)
+    src = PrebufferedSource(inner, prebuffer_frames=10, start_offset=30.0)
+    deadline = time.monotonic() + 2
+    while src.buffered < 5 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert src.buffered >= 5  # filled before anyone read
+    frames = [src.read() for _ in range(7)]
+    assert all(frames[:5]) and frames[5:] == [b"", b""]
+    assert abs(src.position - 30.1) < 1e-9
+    src.cleanup()
+
+def test_cleanup_stops_a_blocked_reader():
+    inner = _Inner(0, block=threading.Event())
+    src = PrebufferedSource(inner, prebuffer_frames=2)
+    src.cleanup()
+    src._thread.join(timeout=2)
+    assert inner.cleaned and not src._thread.is_alive()
+    assert src.read() == b""
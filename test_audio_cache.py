@@ -0,0 +1,60 @@
+import os
+import asyncio
+from audio_cache import AudioCache, _file_name
+
+def _url(c):
+    return f"https://www.youtube.com/watch?v={c * 11}"
+
+def _write(directory, url, size, mtime):
+    path = os.path.join(directory, _file_name(url))
+    with open(path, "wb") as f:
+        f.write(b"\0" * size)
+    os.utime(path, (mtime, mtime))
+    return path
+
+def test_load_restores_lru_order_and_drops_partial_fills(tmp_path):
+    d = str(tmp_path)
+    for i, c in enumerate("abc"):
+        _write(d, _url(c), 100, 1000 + i)
+    part = os.path.join(d, _file_name(_url("d")) + ".part")
+    open(part, "wb").close()
+
+    cache = AudioCache(d, max_bytes=250)  # over budget: the oldest (a) goes on load
+    assert not os.path.exists(part)
+    assert cache.path_for(_url("a")) is None
+    assert cache.path_for(_url("b")) and cache.path_for(_url("c"))
+    assert (cache.hits, cache.misses, cache.evictions, cache.total_bytes) == (2, 1, 1, 200)
+
+def test_eviction_follows_use_not_insertion(tmp_path):
+    d = str(tmp_path)
+    for i, c in enumerate("abc"):
+        _write(d, _url(c), 100, 1000 + i)
+    cache = AudioCache(d, max_bytes=300)
+    assert cache.path_for(_url("a"))  # a becomes the most recently used
+    cache.max_bytes = 200
+    cache._evict()
+    assert not os.path.exists(os.path.join(d, _file_name(_url("b"))))
+    assert cache.path_for(_url("a")) and cache.path_for(_url("c"))
+
+def test_cancel_fills_waits_for_inflight_copies(tmp_path):
+    async def run():
+        cache = AudioCache(str(tmp_path), max_bytes=1000)
+        fill = asyncio.create_task(asyncio.sleep(60))
+        cache._fills["x.ogg"] = fill
+        await cache.cancel_fills()
+        assert fill.cancelled()
+
+    asyncio.run(run())
+
+def test_durations_survive_restart_and_follow_eviction(tmp_path):
+    d = str(tmp_path)
+    cache = AudioCache(d, max_bytes=250)
+    for c, seconds in (("a", 61.5), ("b", None), ("c", 200.0)):
+        _write(d, _url(c), 100, 1000)
+        cache._store(_file_name(_url(c)), seconds)  # what a finished fill does
+    assert cache.peek(_url("a")) is None  # evicted by c
+    assert (cache.hits, cache.misses) == (0, 0)  # peek doesn't count
+
+    reopened = AudioCache(d, max_bytes=250)
+    assert reopened.peek(_url("c")) and reopened.duration(_url("c")) == 200.0
+    assert reopened.duration(_url("b")) is None and reopened.duration(_url("a")) is None
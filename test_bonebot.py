@@ -0,0 +1,207 @@
+import asyncio
+import pytest
+import yt_dlp
+from yt_dlp.extractor.common import InfoExtractor
+from yt_dlp.utils import ExtractorError
+
+import storage
+from extraction import ExtractorPool
+from negative_cache import NegativeCache
+
+@pytest.fixture(scope="module")
+def bonebot(tmp_path_factory):
+    # bonebot builds its caches at import; keep them out of the working directory
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(storage, "DB_PATH", str(tmp_path_factory.mktemp("bonebot") / "cache.sqlite3"))
+        mp.setenv("QUEUE_PERSIST", "0")
+        import bonebot
+    return bonebot
+
+class _PrivateIE(InfoExtractor):
+    IE_NAME = "private"
+    _VALID_URL = r"https://example\.com/private/(?P<id>\w+)"
+    calls = 0
+
+    def _real_extract(self, url):
+        type(self).calls += 1
+        raise ExtractorError("Private video. Sign in if you've been granted access to this video", expected=True)
+
+class _StubPool(ExtractorPool):
+    """Real YoutubeDL instances with the bot's options, but only the stub extractor registered."""
+
+    def _build(self, profile):
+        ydl = yt_dlp.YoutubeDL(self.profiles[profile], auto_init=False)
+        ydl.add_info_extractor(_PrivateIE())
+        return ydl
+
+def test_private_video_is_marked_dead_without_retrying(bonebot, monkeypatch):
+    monkeypatch.setattr(bonebot, "extractor_pool", _StubPool(bonebot.EXTRACTOR_PROFILES, size=1))
+    monkeypatch.setattr(bonebot, "dead_entries", NegativeCache())
+    monkeypatch.setattr(_PrivateIE, "calls", 0)
+    entry = ("Gone", "https://example.com/private/abc")
+
+    async def run():
+        with pytest.raises(Exception, match="Private video"):
+            await bonebot._resolve_candidate(entry)
+        # known dead now: the next attempt fails without extracting again
+        with pytest.raises(Exception, match="Private video"):
+            await bonebot._resolve_candidate(entry)
+
+    asyncio.run(run())
+    assert _PrivateIE.calls == 1
+    assert bonebot._is_dead(entry)
+
+def test_different_playlists_are_not_coalesced(bonebot, monkeypatch):
+    calls = []
+
+    async def fake_extraction(profile, url):
+        calls.append(url)
+        await asyncio.sleep(0.01)
+        return {"title": url}
+
+    monkeypatch.setattr(bonebot, "_run_extraction", fake_extraction)
+
+    async def run():
+        return await asyncio.gather(
+            bonebot.extract_info("single", "https://www.youtube.com/playlist?list=PLaaa"),
+            bonebot.extract_info("single", "https://www.youtube.com/playlist?list=PLbbb"),
+            bonebot.extract_info("single", "https://www.youtube.com/playlist?list=PLaaa&si=x"),
+        )
+
+    a, b, again = asyncio.run(run())
+    assert a["title"].endswith("PLaaa") and b["title"].endswith("PLbbb")
+    assert again is a and len(calls) == 2
+
+def test_cached_tracks_skip_stream_resolution(bonebot, monkeypatch, tmp_path):
+    from audio_cache import AudioCache, _file_name
+
+    url = "https://www.youtube.com/watch?v=aaaaaaaaaaa"
+    cache = AudioCache(str(tmp_path), max_bytes=1000)
+    with open(tmp_path / _file_name(url), "wb") as f:
+        f.write(b"\0" * 100)
+    cache._store(_file_name(url), 180.0)
+
+    async def no_extraction(page_url):
+        raise AssertionError(f"extracted {page_url}")
+
+    monkeypatch.setattr(bonebot, "audio_cache", cache)
+    monkeypatch.setattr(bonebot, "fetch_stream_url", no_extraction)
+
+    async def run():
+        assert await bonebot._prefetch_stream("Song", url) is None
+        assert await bonebot._resolve_candidate(("Song", url)) == cache.peek(url)
+
+    asyncio.run(run())
+
+def test_soundcloud_set_lists_flat_and_resolves_only_the_head(bonebot, monkeypatch):
+    calls = []
+
+    def flat(n):
+        return {"title": f"Track {n}", "webpage_url": f"https://soundcloud.com/a/t{n}", "url": None}
+
+    async def fake_extract(profile, url):
+        calls.append((profile, url))
+        if profile == "flat":
+            return {"title": "Set", "url": None, "entries": [flat(n) for n in range(3)]}
+        return {**flat(0), "url": "https://cf-media.sndcdn.com/t0.mp3", "entries": None}
+
+    monkeypatch.setattr(bonebot, "extract_info", fake_extract)
+    meta, tracks = asyncio.run(bonebot._soundcloud_tracks("https://soundcloud.com/a/sets/s"))
+    assert calls == [("flat", "https://soundcloud.com/a/sets/s"), ("single", "https://soundcloud.com/a/t0")]
+    assert meta["title"] == "Set" and [t["title"] for t in tracks] == ["Track 0", "Track 1", "Track 2"]
+    assert tracks[0]["url"] and tracks[1]["url"] is None
+
+class _Followup:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, content):
+        self.sent.append(content)
+
+class _Interaction:
+    def __init__(self, guild_id):
+        self.guild_id = guild_id
+        self.followup = _Followup()
+
+def _flat_entry(i):
+    vid = f"{i:011d}"
+    return {"id": vid, "title": f"T{i}", "webpage_url": f"https://www.youtube.com/watch?v={vid}", "url": None}
+
+class _PlaylistPool:
+    def __init__(self, entries):
+        self.entries = entries
+
+    def iter_playlist(self, profile, url, batch_size=50, stop=None):
+        batch = []
+        for e in self.entries():
+            if stop is not None and stop.is_set():
+                return
+            batch.append(e)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+def test_remaining_playlist_skips_the_played_video_once(bonebot, monkeypatch):
+    entries = [_flat_entry(i) for i in (0, 1, 2, 1, 3)]  # video 1 is in the playlist twice
+    monkeypatch.setattr(bonebot, "extractor_pool", _PlaylistPool(lambda: iter(entries)))
+    monkeypatch.setattr(bonebot, "PLAYLIST_BATCH_SIZE", 2)
+    interaction = _Interaction(9001)
+
+    async def run():
+        await bonebot.process_remaining_playlist(
+            interaction, "https://www.youtube.com/watch?v=00000000001&list=PL1",
+            skip_url="https://www.youtube.com/watch?v=00000000001",
+        )
+        session = bonebot.sessions.get(9001)
+        queued = [title for title, _ in session.queue]
+        assert not session.playlist_processing
+        bonebot.sessions.close(9001)
+        return queued
+
+    assert asyncio.run(run()) == ["T0", "T2", "T1", "T3"]
+    assert interaction.followup.sent == ["Queued 4 more tracks from the playlist."]
+
+def test_remaining_playlist_stops_with_the_guild(bonebot, monkeypatch):
+    def entries():
+        yield from (_flat_entry(i) for i in range(2))
+        for stop in list(bonebot.sessions.get(9002).playlist_stops):
+            stop.set()  # /stop while the next page loads
+        yield from (_flat_entry(i) for i in range(2, 10))
+
+    monkeypatch.setattr(bonebot, "extractor_pool", _PlaylistPool(entries))
+    monkeypatch.setattr(bonebot, "PLAYLIST_BATCH_SIZE", 2)
+    interaction = _Interaction(9002)
+
+    async def run():
+        await bonebot.process_remaining_playlist(interaction, "https://www.youtube.com/playlist?list=PL2")
+        queued = len(bonebot.sessions.get(9002).queue)
+        bonebot.sessions.close(9002)
+        return queued
+
+    assert asyncio.run(run()) <= 2
+    assert interaction.followup.sent == []
+
+def test_spotify_track_miss_is_counted_once(bonebot, monkeypatch, tmp_path):
+    from spotify_map import SpotifyMap
+
+    class _Spotify:
+        def track(self, track_id):
+            return {"name": "Song", "artists": [{"name": "Artist"}], "external_ids": {"isrc": "ISRC-1"}}
+
+    async def search(query):
+        return "Artist - Song (Official)", "https://www.youtube.com/watch?v=aaaaaaaaaaa"
+
+    mapping = SpotifyMap(str(tmp_path / "map.sqlite3"))
+    monkeypatch.setattr(bonebot, "spotify_map", mapping)
+    monkeypatch.setattr(bonebot, "_yt_search_watch_url", search)
+    interaction = _Interaction(9003)
+
+    async def run():
+        await bonebot._enqueue_spotify_track(interaction, _Spotify(), "track1")
+        await bonebot._enqueue_spotify_track(interaction, _Spotify(), "track1")
+        bonebot.sessions.close(9003)
+
+    asyncio.run(run())
+    assert (mapping.hits, mapping.misses) == (1, 1)
@@ -0,0 +1,188 @@
+import asyncio
+import threading
+import pytest
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from extraction import ExtractorPool, ProcessExtractor, summarize
+
+class _Executor:
+    """Stand-in pool: hands out futures the test resolves by hand."""
+
+    def __init__(self):
+        self.futures = []
+        self.shut_down = False
+
+    def submit(self, fn, *args):
+        fut = Future()
+        self.futures.append(fut)
+        return fut
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shut_down = True
+        if cancel_futures:
+            for fut in self.futures:
+                fut.cancel()
+
+class _Extractor(ProcessExtractor):
+    def __init__(self, *pools):
+        super().__init__({})
+        self._pools = iter(pools)
+
+    def _ensure(self):
+        if self._executor is None:
+            self._executor = next(self._pools)
+        return self._executor
+
+def test_concurrent_broken_pool_restarts_once():
+    async def run():
+        broken, fresh = _Executor(), _Executor()
+        pe = _Extractor(broken, fresh)
+        jobs = [asyncio.create_task(pe.extract("single", f"u{i}")) for i in range(2)]
+        await asyncio.sleep(0)
+        for fut in broken.futures:
+            fut.set_exception(BrokenProcessPool("worker died"))
+        while len(fresh.futures) < 2:
+            await asyncio.sleep(0)
+        for i, fut in enumerate(fresh.futures):
+            fut.set_result({"id": i})
+        assert sorted(r["id"] for r in await asyncio.gather(*jobs)) == [0, 1]
+        assert broken.shut_down and not fresh.shut_down and pe.restarts == 1
+
+    asyncio.run(run())
+
+def test_job_cancelled_by_pool_shutdown_is_an_error():
+    async def run():
+        executor = _Executor()
+        pe = _Extractor(executor)
+        job = asyncio.create_task(pe.extract("single", "u"))
+        await asyncio.sleep(0)
+        pe.reset()
+        assert executor.shut_down
+        with pytest.raises(RuntimeError):
+            await job
+
+    asyncio.run(run())
+
+class _FakeYDL:
+    def __init__(self, profile, info=None):
+        self.profile = profile
+        self.info = info
+        self.closed = False
+
+    def extract_info(self, url, download=True, process=True):
+        return self.info
+
+    def close(self):
+        self.closed = True
+
+class _FakePool(ExtractorPool):
+    def __init__(self, profiles, size, info=None):
+        super().__init__(profiles, size)
+        self.info = info
+        self.built = []
+
+    def _build(self, profile):
+        with self._lock:
+            self.created += 1
+        ydl = _FakeYDL(profile, self.info)
+        self.built.append(ydl)
+        return ydl
+
+def test_checkout_reuses_returned_instances():
+    pool = _FakePool({"single": {}}, size=2)
+    with pool.checkout("single") as first:
+        pass
+    with pool.checkout("single") as again:
+        assert again is first
+    assert (pool.created, pool.checkouts) == (1, 2)
+    assert pool.stats()["idle"] == {"single": 1}
+
+def test_surplus_instances_are_closed_when_the_pool_is_full():
+    pool = _FakePool({"single": {}}, size=1)
+    with pool.checkout("single") as a, pool.checkout("single") as b:
+        assert a is not b  # exhausted: a fresh one is built
+    assert pool.created == 2
+    # b went back first; a found the pool full again and was closed
+    assert [ydl.closed for ydl in pool.built] == [True, False]
+    assert pool.stats()["idle"] == {"single": 1}
+
+def test_warm_up_fills_each_profile():
+    pool = _FakePool({"single": {}, "search": {}, "flat": {}}, size=3)
+    pool.warm_up(["single", "flat"])
+    assert pool.stats()["idle"] == {"single": 3, "search": 0, "flat": 3}
+    pool.warm_up()
+    assert pool.stats()["idle"] == {"single": 3, "search": 3, "flat": 3} and pool.created == 9
+
+def test_summarize_single_video():
+    info = {
+        "id": "dQw4w9WgXcQ", "title": "Song", "webpage_url": "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+        "url": "https://r1.googlevideo.com/videoplayback?expire=1700000000", "acodec": "opus", "duration": 212,
+        "formats": [{"url": "https://ignored"}],
+    }
+    out = summarize(info)
+    assert out["url"] == info["url"] and out["expires_at"] == 1700000000
+    assert (out["title"], out["webpage_url"], out["acodec"], out["duration"]) == \
+        ("Song", info["webpage_url"], "opus", 212)
+    assert out["entries"] is None
+    # no top-level url: the first format with one
+    assert summarize({"id": "x", "formats": [{}, {"url": "https://cdn/a.m3u8"}]})["url"] == "https://cdn/a.m3u8"
+    assert summarize(None) is None
+
+def test_summarize_flat_playlist_uses_page_urls():
+    info = {
+        "_type": "playlist", "id": "PL1", "title": "Mix", "webpage_url": "https://www.youtube.com/playlist?list=PL1",
+        "entries": [
+            {"_type": "url", "ie_key": "Youtube", "id": "aaaaaaaaaaa", "title": "A",
+             "url": "https://www.youtube.com/watch?v=aaaaaaaaaaa"},
+            None,  # unavailable entries come through as None
+            {"_type": "url", "ie_key": "Youtube", "id": "bbbbbbbbbbb", "title": "B"},
+        ],
+    }
+    out = summarize(info)
+    assert out["url"] is None and out["expires_at"] is None
+    assert [(e["title"], e["webpage_url"], e["url"]) for e in out["entries"]] == [
+        ("A", "https://www.youtube.com/watch?v=aaaaaaaaaaa", None),  # _type url: url is the page
+        ("B", "https://www.youtube.com/watch?v=bbbbbbbbbbb", None),  # rebuilt from the YouTube id
+    ]
+
+def test_summarize_search_result():
+    info = {
+        "_type": "playlist", "id": "song", "title": "song", "webpage_url": "ytsearch1:song",
+        "entries": [{"_type": "url", "ie_key": "Youtube", "id": "ccccccccccc", "title": "Song (Official)",
+                     "url": "https://www.youtube.com/watch?v=ccccccccccc", "duration": 200}],
+    }
+    (entry,) = summarize(info)["entries"]
+    assert entry["webpage_url"] == "https://www.youtube.com/watch?v=ccccccccccc"
+    assert entry["title"] == "Song (Official)" and entry["duration"] == 200 and entry["url"] is None
+
+def _flat(i):
+    return {"_type": "url", "ie_key": "Youtube", "id": f"{i:011d}", "title": f"T{i}",
+            "url": f"https://www.youtube.com/watch?v={i:011d}"}
+
+def test_iter_playlist_batches_entries_as_they_arrive():
+    def entries():
+        yield from (_flat(i) for i in range(3))
+        yield None
+        yield {"_type": "playlist", "id": "nested"}  # tabs/nested playlists are not tracks
+        yield from (_flat(i) for i in range(3, 5))
+
+    pool = _FakePool({"flat": {}}, size=1, info={"_type": "playlist", "entries": entries()})
+    batches = list(pool.iter_playlist("flat", "https://www.youtube.com/playlist?list=PL1", batch_size=2))
+    assert [[e["title"] for e in b] for b in batches] == [["T0", "T1"], ["T2", "T3"], ["T4"]]
+    assert pool.stats()["idle"] == {"flat": 1}  # the instance went back after the last page
+
+def test_iter_playlist_stops_when_asked():
+    stop = threading.Event()
+    pulled = []
+
+    def entries():
+        for i in range(100):
+            pulled.append(i)
+            yield _flat(i)
+
+    pool = _FakePool({"flat": {}}, size=1, info={"_type": "playlist", "entries": entries()})
+    out = []
+    for batch in pool.iter_playlist("flat", "https://www.youtube.com/playlist?list=PL1", batch_size=5, stop=stop):
+        out.append(batch)
+        stop.set()
+    assert len(out) == 1 and len(pulled) == 6  # the page after the stop is never fetched
@@ -0,0 +1,33 @@
+import math
+from loudness import LoudnessStore, gain_from, parse_loudnorm
+
+LOUDNORM_OUTPUT = """[Parsed_loudnorm_0 @ 0x55d] 
+{
+	"input_i" : "-20.00",
+	"input_tp" : "-8.00",
+	"input_lra" : "5.10",
+	"input_thresh" : "-30.40",
+	"output_i" : "-24.02",
+	"output_tp" : "-12.00",
+	"target_offset" : "0.02"
+}
+"""
+
+def test_parse_loudnorm_summary():
+    assert parse_loudnorm(LOUDNORM_OUTPUT) == (-20.0, -8.0)
+    assert parse_loudnorm("no summary here") is None
+
+def test_gain_respects_target_and_peak_ceiling():
+    assert math.isclose(gain_from(-20.0, -8.0, target=-14.0), 10 ** (6 / 20))
+    # a +6 dB boost would clip a track peaking at -3 dBTP, so stop at -1 dBTP
+    assert math.isclose(gain_from(-20.0, -3.0, target=-14.0), 10 ** (2 / 20))
+    assert gain_from(-8.0, -0.5, target=-14.0) < 1.0
+
+def test_store_persists_by_video_id(tmp_path):
+    path = str(tmp_path / "loud.sqlite3")
+    store = LoudnessStore(path)
+    assert store.gain_for("https://youtu.be/aaaaaaaaaaa") is None
+    store.put("https://www.youtube.com/watch?v=aaaaaaaaaaa", -20.0, -8.0)
+    reopened = LoudnessStore(path)
+    assert math.isclose(reopened.gain_for("https://youtu.be/aaaaaaaaaaa"), 10 ** (6 / 20))
+    assert reopened.stats()["size"] == 1
@@ -0,0 +1,70 @@
+from array import array
+import pytest
+import mixer
+from mixer import mix, MixerSource, MixSettings
+
+FRAME = array("h", [1000, -1000] * 960).tobytes()
+
+class Frames:
+    def __init__(self, n, frame=FRAME):
+        self.n, self.frame, self.frames = n, frame, 0
+    def read(self):
+        if self.frames >= self.n:
+            return b""
+        self.frames += 1
+        return self.frame
+    @property
+    def position(self):
+        return self.frames * 0.02
+    def cleanup(self):
+        pass
+
+def test_unity_gain_is_passthrough_and_clips():
+    assert mix(FRAME, 1.0, 1.0) is FRAME
+    loud = array("h", mix(FRAME, 40.0, 40.0))
+    assert loud[0] == 32767 and loud[1] == -32768
+
+def test_array_fallback_matches_constant_gain(monkeypatch):
+    monkeypatch.setattr(mixer, "np", None)
+    monkeypatch.setattr(mixer, "audioop", None)
+    out = array("h", mix(FRAME, 0.5, 0.5, FRAME, 0.25, 0.25))
+    assert out[0] == 750 and out[1] == -750
+
+RAMP = array("h", [(i * 37) % 20000 - 10000 for i in range(1920)]).tobytes()
+
+def _close_to_reference(fn, tolerance):
+    for args in [(RAMP, 0.5, 0.5, None, 0, 0), (RAMP, 3.0, 3.0, None, 0, 0),
+                 (RAMP, 1.0, 0.8, FRAME, 0.0, 0.2), (RAMP, 0.9, 0.1, RAMP, 0.1, 0.9)]:
+        want, got = array("h", mixer._mix_array(*args)), array("h", fn(*args))
+        assert len(got) == len(want)
+        assert max(abs(x - y) for x, y in zip(want, got)) <= tolerance
+
+def test_audioop_path_matches_array_fallback():
+    pytest.importorskip("audioop")
+    # stepped ramps: within one step's gain change of the per-sample ramp
+    _close_to_reference(mixer._mix_audioop, 10000 * 0.8 / mixer.RAMP_STEPS + 2)
+
+def test_numpy_path_matches_array_fallback():
+    pytest.importorskip("numpy")
+    _close_to_reference(mixer._mix_numpy, 2)
+
+def test_volume_change_applies_on_next_frame():
+    settings = MixSettings(volume=1.0)
+    src = MixerSource(Frames(10), settings)
+    assert src.read() == FRAME
+    settings.volume = 0.5
+    src.read()  # ramps 1.0 -> 0.5
+    assert array("h", src.read())[0] == 500
+
+def test_crossfade_mixes_in_next_track():
+    settings = MixSettings(volume=1.0, crossfade=0.1)
+    cur = MixerSource(Frames(10), settings, duration=0.2)
+    nxt = MixerSource(Frames(10), settings, duration=0.2)
+    cur.next = nxt
+    for _ in range(5):
+        cur.read()
+    assert nxt._inner.frames == 0
+    while cur.read():
+        pass
+    assert nxt._inner.frames == 5
+    assert 0 < nxt._last <= 1.0
@@ -0,0 +1,17 @@
+import time
+from negative_cache import NegativeCache, is_permanent_error
+
+def test_permanent_errors_are_recognized():
+    assert is_permanent_error(Exception("ERROR: [youtube] abc: Private video. Sign in if you've been granted access"))
+    assert is_permanent_error(Exception("ERROR: [youtube] abc: Video unavailable. This video has been removed by the uploader"))
+    assert not is_permanent_error(Exception("HTTP Error 503: Service Unavailable"))
+    assert not is_permanent_error(Exception("Read timed out"))
+
+def test_entries_expire_and_share_video_key():
+    cache = NegativeCache(ttl=60)
+    cache.add("https://www.youtube.com/watch?v=aaaaaaaaaaa", "Private video")
+    assert cache.get("https://youtu.be/aaaaaaaaaaa") == "Private video"
+    assert cache.get("https://youtu.be/bbbbbbbbbbb") is None
+    cache._data["yt:aaaaaaaaaaa"] = (time.time() - 1, "Private video")
+    assert cache.get("https://youtu.be/aaaaaaaaaaa") is None
+    assert cache.stats() == {"size": 0, "hits": 1, "added": 1}
@@ -0,0 +1,55 @@
+import asyncio
+from ordered_map import map_ordered
+
+def test_results_come_back_in_input_order_within_the_limit():
+    running, peak = [], []
+
+    async def work(x):
+        running.append(x)
+        peak.append(len(running))
+        await asyncio.sleep(0.001 * (5 - x))  # later items finish first
+        running.remove(x)
+        return x * 10
+
+    async def main():
+        return [pair async for pair in map_ordered(work, range(5), limit=2)]
+
+    assert asyncio.run(main()) == [(x, x * 10) for x in range(5)]
+    assert max(peak) == 2
+
+def test_failures_are_returned_as_values():
+    async def work(x):
+        if x == 1:
+            raise ValueError("bad item")
+        return x
+
+    async def main():
+        return [pair async for pair in map_ordered(work, range(3))]
+
+    results = asyncio.run(main())
+    assert [item for item, _ in results] == [0, 1, 2]
+    assert isinstance(results[1][1], ValueError)
+    assert results[0][1] == 0 and results[2][1] == 2
+
+def test_closing_the_consumer_cancels_in_flight_work():
+    started, cancelled = [], []
+
+    async def work(x):
+        started.append(x)
+        try:
+            await asyncio.sleep(0 if x == 0 else 60)
+        except asyncio.CancelledError:
+            cancelled.append(x)
+            raise
+        return x
+
+    async def main():
+        gen = map_ordered(work, range(10), limit=3)
+        assert await gen.__anext__() == (0, 0)
+        await asyncio.sleep(0)  # let the refill (item 3) start
+        await gen.aclose()
+        await asyncio.sleep(0)
+
+    asyncio.run(main())
+    assert started == [0, 1, 2, 3]  # item 3 started when 0 was consumed; nothing after
+    assert sorted(cancelled) == [1, 2, 3]
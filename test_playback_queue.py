@@ -0,0 +1,88 @@
+import random
+from hypothesis import given, settings, strategies as st
+from playback_queue import PlaybackQueue, WATCH_PREFIX
+
+def _entry(i):
+    # alternate between compactly stored watch URLs and entries kept as-is
+    url = f"{WATCH_PREFIX}{i:011d}" if i % 2 else f"url{i}"
+    return (f"Song{i}", url)
+
+class SmallBlocks(PlaybackQueue):
+    BLOCK = 4  # force many blocks, splits and retirements in small examples
+
+ops = st.lists(
+    st.tuples(
+        st.sampled_from(["append", "popleft", "insert", "pop", "move", "set", "jump", "shuffle"]),
+        st.integers(min_value=-40, max_value=40),
+        st.integers(min_value=-40, max_value=40),
+    ),
+    max_size=200,
+)
+
+@settings(max_examples=300)
+@given(initial=st.integers(min_value=0, max_value=30), ops=ops)
+def test_matches_list_model(initial, ops):
+    model = [_entry(i) for i in range(initial)]
+    q = SmallBlocks(model)
+    counter = initial
+    for op, a, b in ops:
+        counter += 1
+        entry = _entry(counter)
+        if op == "append":
+            q.append(entry)
+            model.append(entry)
+        elif op == "insert":
+            q.insert(a, entry)
+            model.insert(a, entry)
+        elif not model:
+            continue
+        elif op == "popleft":
+            assert q.popleft() == model.pop(0)
+        elif op == "pop":
+            i = a % len(model)
+            assert q.pop(i) == model.pop(i)
+        elif op == "move":
+            i, j = a % len(model), b % len(model)
+            q.move(i, j)
+            model.insert(j, model.pop(i))
+        elif op == "set":
+            i = a % len(model)
+            q[i] = entry
+            model[i] = entry
+        elif op == "jump":
+            i = a % (len(model) + 1)
+            assert q.jump(i) == model[:i]
+            del model[:i]
+        elif op == "shuffle":
+            rng = random.Random(a)
+            q.shuffle(rng)
+            random.Random(a).shuffle(model)
+        assert q == model
+        assert len(q) == len(model)
+        if model:
+            assert q[0] == model[0] and q[-1] == model[-1]
+            assert q[1:6] == model[1:6]
+
+def test_list_compatible_surface():
+    q = PlaybackQueue()
+    assert q == [] and not q
+    q.extend([("a", "1"), ("b", "2"), ("c", "3")])
+    assert q.pop(0) == ("a", "1")
+    assert list(q.iter_from(1)) == [("c", "3")]
+    q.clear()
+    assert q == []
+
+def test_watch_entries_come_back_as_plain_tuples():
+    url = WATCH_PREFIX + "dQw4w9WgXcQ"
+    q = PlaybackQueue([("Song", url), ("Other", url + "&list=PL1"), ("Song", url)])
+    assert type(q[0]) is tuple and "%s | %s" % q[0] == f"Song | {url}"
+    assert list(q) == [("Song", url), ("Other", url + "&list=PL1"), ("Song", url)]
+
+def test_read_entries_keep_their_identity():
+    q = SmallBlocks(_entry(i) for i in range(1, 20, 2))
+    head, window = q[0], q[:3]
+    assert q[0] is head and window[0] is head and q[1] is window[1]
+    q.shuffle(random.Random(1))
+    assert any(e is head for e in q[:len(q)])
+    q.jump(q[:len(q)].index(head))
+    assert q.popleft() is head
@@ -0,0 +1,46 @@
+import asyncio
+from prefetch import Prefetcher
+
+def test_entries_leaving_the_window_are_cancelled():
+    async def run():
+        started, cancelled = [], []
+
+        async def resolve(title, url):
+            started.append(url)
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                cancelled.append(url)
+                raise
+
+        pf = Prefetcher(resolve, depth=2)
+        pf.schedule([("A", "a"), ("B", "b"), ("C", "c")])
+        await asyncio.sleep(0)
+        assert started == ["a", "b"]  # only `depth` entries are resolved
+        pf.schedule([("B", "b"), ("C", "c")])  # a was skipped
+        await asyncio.sleep(0)
+        assert cancelled == ["a"] and started == ["a", "b", "c"]
+        pf.invalidate()
+        await asyncio.sleep(0)
+        assert sorted(cancelled) == ["a", "b", "c"]
+
+    asyncio.run(run())
+
+def test_take_hits_and_misses():
+    async def run():
+        async def resolve(title, url):
+            await asyncio.sleep(0)
+            if url == "bad":
+                raise RuntimeError("extraction failed")
+            return f"stream:{url}"
+
+        pf = Prefetcher(resolve, depth=3)
+        pf.schedule([("A", "a"), ("X", "bad"), ("C", "c")])
+        pf._tasks["c"].cancel()
+        assert await pf.take("a") == "stream:a"  # waits for the in-flight task
+        assert await pf.take("bad") is None      # failed resolution
+        assert await pf.take("never") is None    # not scheduled
+        assert await pf.take("c") is None        # cancelled task
+        assert (pf.hits, pf.misses) == (1, 3)
+
+    asyncio.run(run())
@@ -0,0 +1,45 @@
+import random
+from queue_store import QueueStore
+
+def _entry(i):
+    return (f"Song {i}", f"https://example.com/{i}")
+
+def test_restore_replays_logged_changes(tmp_path):
+    path = str(tmp_path / "queues.sqlite3")
+    store = QueueStore(path, flush_interval=60, compact_min=1000)
+    q = store.queue(1)
+    q.extend(_entry(i) for i in range(6))
+    q.popleft()
+    q.move(3, 0)
+    q.insert(2, _entry(9))
+    q[1] = _entry(8)
+    del q[-1]
+    q.jump(1)
+    store.set_playback(1, 10, 20, _entry(0), 42.5)
+    replaced = q
+    store.queue(2).append(_entry(7))
+    store.forget(2)
+    store.close()
+
+    (guild_id, restored, voice, text, current, position), = QueueStore(path).load()
+    assert (guild_id, voice, text, current, position) == (1, 10, 20, _entry(0), 42.5)
+    assert restored == list(replaced)
+
+def test_compaction_bounds_the_log(tmp_path):
+    path = str(tmp_path / "queues.sqlite3")
+    store = QueueStore(path, flush_interval=60, compact_min=16)
+    q = store.queue(1, [_entry(i) for i in range(10)])
+    rng = random.Random(0)
+    for i in range(500):
+        q.append(_entry(100 + i))
+        q.pop(rng.randrange(len(q)))
+    store.flush()
+    assert store.compactions > 1
+    assert store.stats()["log_rows"] <= len(q) + 16
+    # a queue replaced by a newer one for the guild stops journaling
+    q.append(_entry(1))
+    store.queue(1, list(q)[:3])
+    q.append(_entry(2))
+    store.close()
+    (_, restored, *_), = QueueStore(path).load()
+    assert restored == list(q)[:3]
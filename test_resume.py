@@ -0,0 +1,16 @@
+from resume import parse_timestamp, should_resume
+
+def test_parse_timestamp():
+    assert parse_timestamp("90") == 90
+    assert parse_timestamp(" 1:30 ") == 90
+    assert parse_timestamp("1:02:03") == 3723
+    assert parse_timestamp("2.5") == 2.5
+    for bad in ("", "abc", "1:2:3:4", "-5", "1:-1", "nan", "inf", "1:inf", "-inf"):
+        assert parse_timestamp(bad) is None, bad
+
+def test_should_resume_only_early_drops_within_budget():
+    assert should_resume(200, 60, 5, 0, 3)
+    assert not should_resume(200, 197, 5, 0, 3)  # ended inside the tail: a normal end
+    assert not should_resume(200, 60, 5, 3, 3)   # attempts used up
+    assert not should_resume(200, 60, 5, 0, 0)   # resuming disabled
+    assert not should_resume(None, 60, 5, 0, 3)  # unknown length (live stream)
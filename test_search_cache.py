@@ -0,0 +1,51 @@
+import time
+from search_cache import SearchCache, normalize_query
+
+def test_normalize_query_ignores_case_and_spacing():
+    assert normalize_query("  Daft Punk  -  One More   Time ") == normalize_query("daft punk - one more time")
+
+def test_hit_survives_restart(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    SearchCache(path).put("Artist - Song", "Artist - Song (Official)", "https://www.youtube.com/watch?v=aaaaaaaaaaa")
+    cache = SearchCache(path)
+    assert cache.get("artist - song") == ("Artist - Song (Official)", "https://www.youtube.com/watch?v=aaaaaaaaaaa")
+    assert cache.stats()["disk_hits"] == 1
+    assert cache.get("artist - song") is not None
+    assert cache.stats()["disk_hits"] == 1  # second lookup served from memory
+
+def test_expired_rows_are_ignored(tmp_path):
+    cache = SearchCache(str(tmp_path / "cache.sqlite3"), ttl=-1)
+    cache.put("q", "t", "u")
+    assert cache.get("q") is None
+
+def test_trim_keeps_most_recently_used(tmp_path):
+    cache = SearchCache(str(tmp_path / "cache.sqlite3"), max_rows=2, memory_size=0)
+    for q in ("a", "b", "c"):
+        cache.put(q, q.upper(), f"url-{q}")
+    cache._trim(time.time())
+    assert cache.get("a") is None
+    assert cache.get("c") == ("C", "url-c")
+
+def test_memory_hits_keep_a_query_recent_on_disk(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = SearchCache(path, max_rows=2)
+    for q in ("popular", "b"):
+        cache.put(q, q.upper(), f"url-{q}")
+    time.sleep(0.01)
+    assert cache.get("popular") is not None  # answered from memory
+    cache.put("c", "C", "url-c")
+    cache._trim(time.time())
+    on_disk = SearchCache(path)
+    assert on_disk.get("b") is None  # the least recently used row went, not the popular one
+    assert on_disk.get("popular") == ("POPULAR", "url-popular")
+
+def test_flush_writes_memory_hits(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = SearchCache(path)
+    cache.put("q", "T", "u")
+    (before,) = cache._db.execute("SELECT last_used FROM search_cache").fetchone()
+    time.sleep(0.01)
+    cache.get("q")
+    cache.flush()
+    (after,) = cache._db.execute("SELECT last_used FROM search_cache").fetchone()
+    assert after > before
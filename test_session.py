@@ -0,0 +1,54 @@
+import asyncio
+import threading
+from session import GuildSession, SessionRegistry
+
+class _Source:
+    def __init__(self):
+        self.cleaned = False
+        self.next = None
+
+    def cleanup(self):
+        self.cleaned = True
+
+class _Voice:
+    def __init__(self, source):
+        self.source = source
+
+def test_close_releases_tasks_timers_and_sources():
+    async def run():
+        loop = asyncio.get_running_loop()
+        registry = SessionRegistry()
+        session = registry.open(1)
+        assert registry.open(1) is session and 1 in registry
+        session.queue.append(("a", "https://example.com/a"))
+        session.lookahead_task = asyncio.create_task(asyncio.sleep(60))
+        session.prespawn_timer = loop.call_later(60, lambda: None)
+        session.prespawn_task = asyncio.create_task(asyncio.sleep(60))
+        pre, playing = _Source(), _Source()
+        playing.next = pre
+        session.voice_client = _Voice(playing)
+        session.prespawned = (None, "b", "https://example.com/b", pre, 30.0)
+        task, timer, opening = session.lookahead_task, session.prespawn_timer, session.prespawn_task
+
+        registry.close(1)
+        await asyncio.sleep(0)
+        assert task.cancelled() and timer.cancelled() and opening.cancelled()
+        assert pre.cleaned and playing.next is None
+        assert not session.queue and session.voice_client is None
+        assert registry.get(1) is None and len(registry) == 0
+        assert (registry.opened, registry.closed) == (1, 1)
+
+    asyncio.run(run())
+
+def test_reset_keeps_voice_connection():
+    session = GuildSession(2)
+    voice = _Voice(None)
+    session.voice_client = voice
+    session.queue.append(("a", "https://example.com/a"))
+    first, second = threading.Event(), threading.Event()
+    session.playlist_stops.update((first, second))
+    assert session.playlist_processing
+    session.reset()
+    assert session.voice_client is voice
+    assert not session.queue and not session.playlist_processing
+    assert first.is_set() and second.is_set()
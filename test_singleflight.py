@@ -0,0 +1,59 @@
+import asyncio
+import pytest
+from singleflight import SingleFlight
+
+def test_concurrent_calls_share_one_execution():
+    calls = []
+
+    async def work(x):
+        calls.append(x)
+        await asyncio.sleep(0.01)
+        return x * 2
+
+    async def main():
+        sf = SingleFlight()
+        results = await asyncio.gather(*(sf.do("k", work, 21) for _ in range(5)))
+        return sf, results
+
+    sf, results = asyncio.run(main())
+    assert results == [42] * 5
+    assert calls == [21]
+    assert sf.shared == 4 and len(sf) == 0
+
+def test_failures_fan_out_and_are_not_cached():
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        await asyncio.sleep(0.01)
+        if len(attempts) == 1:
+            raise RuntimeError("boom")
+        return "ok"
+
+    async def main():
+        sf = SingleFlight()
+        first = await asyncio.gather(sf.do("k", flaky), sf.do("k", flaky), return_exceptions=True)
+        second = await sf.do("k", flaky)
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert all(isinstance(r, RuntimeError) for r in first)
+    assert second == "ok"
+    assert len(attempts) == 2
+
+def test_cancelled_waiter_does_not_cancel_others():
+    async def slow():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def main():
+        sf = SingleFlight()
+        a = asyncio.create_task(sf.do("k", slow))
+        b = asyncio.create_task(sf.do("k", slow))
+        await asyncio.sleep(0)
+        a.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await a
+        return await b
+
+    assert asyncio.run(main()) == "done"
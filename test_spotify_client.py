@@ -0,0 +1,30 @@
+import json
+from spotify_client import LocalSpotify
+
+def _fixture(tmp_path):
+    tracks = [{"id": f"t{i}", "name": f"Song {i}", "artists": [{"name": "Band"}]} for i in range(5)]
+    data = {
+        "tracks": {"t0": tracks[0]},
+        "playlists": {"pl": tracks},
+        "albums": {"al": {"name": "Record", "artists": [{"name": "Band"}], "tracks": tracks[:3]}},
+    }
+    path = tmp_path / "spotify.json"
+    path.write_text(json.dumps(data))
+    return str(path)
+
+def test_local_playlist_pages_through_next(tmp_path):
+    sp = LocalSpotify(_fixture(tmp_path), page_size=2)
+    page = sp.playlist_items("pl", limit=100)
+    seen = []
+    while page:
+        seen += [item["track"]["id"] for item in page["items"]]
+        page = sp.next(page) if page.get("next") else None
+    assert seen == ["t0", "t1", "t2", "t3", "t4"]
+
+def test_local_album_embeds_first_track_page(tmp_path):
+    sp = LocalSpotify(_fixture(tmp_path), page_size=2)
+    album = sp.album("al")
+    assert [t["id"] for t in album["tracks"]["items"]] == ["t0", "t1"]
+    assert [t["id"] for t in sp.next(album["tracks"])["items"]] == ["t2"]
+    assert sp.track("t0")["name"] == "Song 0"
+    assert sp.track("missing") is None
@@ -0,0 +1,28 @@
+from spotify_map import SpotifyMap
+
+def test_lookup_by_track_id_then_isrc(tmp_path):
+    m = SpotifyMap(str(tmp_path / "map.sqlite3"))
+    m.put("track1", "USRC17607839", "Song (Official)", "https://www.youtube.com/watch?v=aaaaaaaaaaa")
+    assert m.get("track1") == ("Song (Official)", "https://www.youtube.com/watch?v=aaaaaaaaaaa")
+    # Same recording on a different release: new track ID, same ISRC
+    assert m.get("track2", "USRC17607839") == ("Song (Official)", "https://www.youtube.com/watch?v=aaaaaaaaaaa")
+    assert m.get("track3") is None
+    assert m.stats()["hits"] == 2 and m.stats()["misses"] == 1
+
+def test_get_many_returns_only_hits(tmp_path):
+    m = SpotifyMap(str(tmp_path / "map.sqlite3"))
+    m.put("a", None, "A", "url-a")
+    m.put("b", "ISRC-B", "B", "url-b")
+    found = m.get_many([("a", None), ("x", "ISRC-B"), ("y", None), (None, None)])
+    assert found == {"a": ("A", "url-a"), "x": ("B", "url-b")}
+    assert m.stats()["misses"] == 1
+
+def test_repeat_lookup_after_a_miss_counts_once(tmp_path):
+    m = SpotifyMap(str(tmp_path / "map.sqlite3"))
+    m.put("track1", "ISRC-1", "Song", "url-1")
+    assert m.get("track2") is None  # by ID only, before the track's ISRC is known
+    assert m.get("track2", "ISRC-1", after_miss=True) == ("Song", "url-1")
+    assert (m.stats()["hits"], m.stats()["misses"]) == (1, 0)
+    assert m.get("track3") is None
+    assert m.get("track3", "ISRC-3", after_miss=True) is None
+    assert (m.stats()["hits"], m.stats()["misses"]) == (1, 1)
@@ -0,0 +1,50 @@
+import json
+import time
+import base64
+import stream_cache
+from stream_cache import StreamCache
+
+def test_cache_key_canonicalizes_youtube_urls():
+    a = stream_cache.cache_key("https://www.youtube.com/watch?v=dQw4w9WgXcQ&list=PL123")
+    b = stream_cache.cache_key("https://youtu.be/dQw4w9WgXcQ?t=10")
+    assert a == b == "yt:dQw4w9WgXcQ"
+
+def test_cache_key_keeps_the_query_that_picks_the_media():
+    a = stream_cache.cache_key("https://www.youtube.com/playlist?list=PLaaa")
+    b = stream_cache.cache_key("https://www.youtube.com/playlist?list=PLbbb")
+    assert a != b
+    assert a == stream_cache.cache_key("https://www.youtube.com/playlist?si=share&list=PLaaa#top")
+    assert stream_cache.cache_key("https://soundcloud.com/artist/track?utm_source=clipboard") == "soundcloud.com/artist/track"
+
+def test_parse_expiry_from_query_and_path():
+    assert stream_cache.parse_expiry("https://r1.googlevideo.com/videoplayback?expire=1700000000&ei=x") == 1700000000
+    assert stream_cache.parse_expiry("https://manifest.googlevideo.com/api/manifest/hls/expire/1700000000/ei/x") == 1700000000
+    assert stream_cache.parse_expiry("https://example.com/audio.mp3") is None
+
+def test_hit_until_safety_margin_before_expiry():
+    cache = StreamCache(safety_margin=60)
+    fresh = f"https://r1.googlevideo.com/videoplayback?expire={int(time.time()) + 3600}"
+    stale = f"https://r1.googlevideo.com/videoplayback?expire={int(time.time()) + 30}"
+    cache.put("https://youtu.be/aaaaaaaaaaa", {"url": fresh})
+    cache.put("https://youtu.be/bbbbbbbbbbb", {"url": stale})
+    assert cache.get("https://www.youtube.com/watch?v=aaaaaaaaaaa")["url"] == fresh
+    assert cache.get("https://www.youtube.com/watch?v=bbbbbbbbbbb") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+def test_lru_eviction_respects_recent_use():
+    cache = StreamCache(max_entries=2)
+    for vid in ("aaaaaaaaaaa", "bbbbbbbbbbb"):
+        cache.put(f"https://youtu.be/{vid}", {"url": f"https://cdn/{vid}"})
+    cache.get("https://youtu.be/aaaaaaaaaaa")
+    cache.put("https://youtu.be/ccccccccccc", {"url": "https://cdn/c"})
+    assert cache.get("https://youtu.be/bbbbbbbbbbb") is None
+    assert cache.get("https://youtu.be/aaaaaaaaaaa") is not None
+    assert cache.stats()["evictions"] == 1
+
+def test_parse_expiry_from_cloudfront_policy():
+    doc = {"Statement": [{"Condition": {"DateLessThan": {"AWS:EpochTime": 1700000000}}}]}
+    raw = base64.b64encode(json.dumps(doc).encode()).decode()
+    policy = raw.replace("+", "-").replace("=", "_").replace("/", "~")
+    url = f"https://cf-hls-media.sndcdn.com/playlist/abc.m3u8?Policy={policy}&Signature=x&Key-Pair-Id=y"
+    assert stream_cache.parse_expiry(url) == 1700000000